@@ -0,0 +1,170 @@
+'''Compute ladder probabilities without sampling seasons.
+
+This works for sports whose definition has a 'probabilities' function,
+giving the chances of each outcome of a match from the two teams alone:
+
+    def probabilities(team1, team2, teams, settings):
+        return (team1_wins, draw, team2_wins)
+
+Such a sport must not change its teams as it is played, so that every match
+of the season is independent of the others. Each team's points are then the
+sum of independent match outcomes, and their distribution is found exactly
+by convolving the outcomes one match at a time.
+
+The chance of making the finals is an approximation, because it treats
+teams' points as independent of each other (see top_probabilities).
+Finding it exactly would mean following every combination of results.
+
+NumPy is required.'''
+
+import numpy as np
+
+import ladder
+import sports
+from ladder import DRAW, LOSS, WIN
+
+# Probabilities below this are treated as zero when ranking teams.
+negligible = 1e-12
+
+
+class Analysis:
+    '''The exact distribution of each team's points at the end of the main
+    season, with each team's approximate probability of making the
+    finals.'''
+
+    def __init__(self, distributions, finals):
+        self.distributions = distributions
+        self.finals = finals
+
+    def expected_points(self, team):
+        distribution = self.distributions[team]
+        return float(np.dot(np.arange(len(distribution)), distribution))
+
+    def probabilities(self):
+        '''Return, for each team, the probability of finishing the season
+        on each number of points and of making the finals.'''
+        return {team: {'Points': distribution.tolist(),
+                       'Finals': self.finals[team]}
+                for team, distribution in self.distributions.items()}
+
+    def matrix(self):
+        '''Return matrix to display as table, ordered by expected points.'''
+        analysis_matrix = [['Name', 'Expected Points', 'Most Likely Points',
+                            'Finals (approx.)']]
+
+        for team in sorted(self.distributions, key=self.expected_points,
+                           reverse=True):
+            analysis_matrix.append(
+                [team,
+                 '{:.2f}'.format(self.expected_points(team)),
+                 str(int(np.argmax(self.distributions[team]))),
+                 '{:.1%}'.format(self.finals[team])])
+
+        return analysis_matrix
+
+
+def points_distributions(teams, fixture, game,
+                         points={WIN: 2, DRAW: 1, LOSS: 0}):
+    '''Return, for each team, an array of the probabilities of it finishing
+    the fixture on each number of points.'''
+    if 'probabilities' not in game:
+        raise ValueError('Sport does not support analytic forecasts!')
+
+    if hasattr(fixture, 'attach'):
+        raise ValueError('Fixture depends on results, so it cannot be '
+                         'analysed!')
+
+    distributions = {team: np.ones(1) for team in teams}
+    kernel_size = max(points.values()) + 1
+
+    def kernel(win, draw, loss):
+        outcomes = np.zeros(kernel_size)
+        outcomes[points[WIN]] += win
+        outcomes[points[DRAW]] += draw
+        outcomes[points[LOSS]] += loss
+        return outcomes
+
+    for round_matches in fixture:
+        for team1, team2 in round_matches:
+            if ladder.BYE in (team1, team2):
+                continue
+
+            first, draw, second = game['probabilities'](team1, team2, teams,
+                                                        game['settings'])
+
+            distributions[team1] = np.convolve(distributions[team1],
+                                               kernel(first, draw, second))
+            distributions[team2] = np.convolve(distributions[team2],
+                                               kernel(second, draw, first))
+
+    return distributions
+
+
+def top_probabilities(distributions, top_teams):
+    '''Return, for each team, the probability that it finishes in the top
+    top_teams places, given the distributions of points in team order. Teams
+    level on points are ranked in that order, as on a Ladder without
+    tie-breakers.
+
+    Teams' points are treated as independent of each other. They are not,
+    since one team's win is another's loss, so this is an approximation
+    rather than exact, and may be out by a few percentage points for teams
+    near the cut-off. Outcomes less likely than negligible are skipped.'''
+    names = list(distributions)
+
+    if top_teams >= len(names):
+        return {team: 1.0 for team in names}
+
+    size = max(len(distribution) for distribution in distributions.values())
+    table = np.zeros((len(names), size))
+    for index, team in enumerate(names):
+        table[index, :len(distributions[team])] = distributions[team]
+
+    # tails[j, k] is the probability of team j finishing on k points or
+    # more.
+    tails = np.zeros((len(names), size + 1))
+    tails[:, :size] = np.cumsum(table[:, ::-1], axis=1)[:, ::-1]
+
+    probabilities = {}
+
+    for position, team in enumerate(names):
+        totals = np.flatnonzero(table[position] >= negligible)
+
+        # Teams listed before this one rank above it when level on points.
+        above_chance = np.vstack([tails[:position, totals],
+                                  tails[position + 1:, totals + 1]])
+        above_chance = above_chance[above_chance.max(axis=1) >= negligible]
+
+        # above[k, t] is the probability that k other teams rank above when
+        # finishing on totals[t] points, tracked up to top_teams, beyond
+        # which the team misses out.
+        above = np.zeros((top_teams + 1, len(totals)))
+        above[0] = 1.0
+
+        for chance in above_chance:
+            above[1:] = above[1:] * (1 - chance) + above[:-1] * chance
+            above[0] *= 1 - chance
+
+        probabilities[team] = float(np.dot(table[position, totals],
+                                           above[:top_teams].sum(axis=0)))
+
+    return probabilities
+
+
+def analyse(teams=ladder.teams, game=sports.games['Football (soccer)'],
+            structure=ladder.tournament_structures['Round Robin'],
+            finals=ladder.finals_structures['Elimination']):
+    '''Return an Analysis of the main season of the given structure, with
+    each team's chance of being among the finals structure's top_teams
+    (every team if it is 0).'''
+    game = ladder.copy_definition(game)
+    structure = ladder.copy_definition(structure)
+    finals = ladder.copy_definition(finals)
+
+    fixture = structure['function_name'](teams, structure['settings'])
+    distributions = points_distributions(teams, fixture, game)
+
+    top_teams = finals['settings'].get('top_teams') or len(teams)
+
+    return Analysis(distributions,
+                    top_probabilities(distributions, top_teams))
@@ -0,0 +1,434 @@
+'''Benchmarks of fixture generation, match play, ladder updates, finals and
+result output, for leagues of several sizes.
+
+For example,
+    python bench.py --sizes 8 512 10000 --json bench.json
+    python bench.py --baseline bench.json
+
+Each benchmark is timed a number of times, keeping the fastest, and then run
+once more under tracemalloc to measure its peak memory use. Large leagues
+play only the first matches of their fixture, up to a budget, so that every
+benchmark finishes in a reasonable time.'''
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import ladder
+import sports
+from cli import format_table
+
+default_sizes = [8, 64, 512, 10000]
+default_revolutions = [1, 2]
+
+# Most matches played by a single benchmark.
+default_budget = 100000
+
+
+def make_teams(size, seed=0):
+    '''Return a league of size teams with random values for every parameter
+    used by a sport in sports.games.'''
+    rng = random.Random(seed)
+    fields = sorted({field for game in sports.games.values()
+                     for field in game['parameters'] if field != 'Name'})
+
+    return {'Team {:05d}'.format(number): {field: rng.randint(1, 10)
+                                           for field in fields}
+            for number in range(size)}
+
+
+def fixture_matches(fixture, budget):
+    '''Return the matches of a fixture in order, with their round numbers,
+    stopping after budget matches.'''
+    matches = []
+
+    for round_number, round_matches in enumerate(fixture):
+        for match in round_matches:
+            if ladder.BYE in match:
+                continue
+            if len(matches) == budget:
+                return matches
+            matches.append((round_number + 1, match))
+
+    return matches
+
+
+class Case:
+    '''The state shared by the benchmarks of one league size and number of
+    revolutions. game is used by the benchmarks which are not run for every
+    sport.'''
+
+    def __init__(self, size, revolutions, game, budget):
+        self.game = ladder.copy_definition(game)
+        self.teams = make_teams(size)
+        self.settings = {'revolutions': revolutions}
+        self.fixture = ladder.round_robin(self.teams, self.settings)
+        self.matches = fixture_matches(self.fixture, budget)
+        self.budget = budget
+
+    def league(self):
+        return {name: dict(attributes)
+                for name, attributes in self.teams.items()}
+
+    def new_ladder(self):
+        return ladder.Ladder(len(self.fixture), self.teams)
+
+    def results(self):
+        '''Return random MatchResults for the benchmark's matches.'''
+        rng = random.Random(0)
+        ids = self.new_ladder().ids
+        stats = tuple(['10/150'] * len(self.game.get('stats', ())))
+
+        return [(round_no, ladder.MatchResult(rng.choice((ladder.WIN,
+                                                          ladder.DRAW)),
+                                              ids[match[0]], ids[match[1]],
+                                              stats))
+                for round_no, match in self.matches]
+
+
+# Each benchmark takes a Case and returns a function which runs it and
+# returns the number of matches handled. Only that function is timed.
+
+def bench_fixture(case):
+    def run():
+        fixture = ladder.round_robin(case.teams, case.settings)
+        return len(fixture_matches(fixture, case.budget))
+
+    return run
+
+
+def bench_play(case, game_name):
+    game = ladder.copy_definition(sports.games[game_name])
+    season_ladder = case.new_ladder()
+    league = case.league()
+    rng = random.Random(0)
+
+    def run():
+        for round_no, match in case.matches:
+            ladder.play(match[0], match[1], game, season_ladder, league,
+                        rng=rng)
+        return len(case.matches)
+
+    return run
+
+
+def bench_play_round(case, game_name):
+    # Import NumPy before timing, as the batch functions import it lazily.
+    importlib.import_module('numpy')
+
+    game = ladder.copy_definition(sports.games[game_name])
+    season_ladder = case.new_ladder()
+    league = case.league()
+
+    # Play the same matches as the other benchmarks, a round at a time.
+    rounds = {}
+    for round_no, match in case.matches:
+        rounds.setdefault(round_no, []).append(match)
+
+    def run():
+        matches = 0
+        for round_no, round_matches in rounds.items():
+            matches += len(ladder.play_round(round_matches, game,
+                                             season_ladder, league, seed=0,
+                                             round_no=round_no, batch=True))
+        return matches
+
+    return run
+
+
+def bench_record_result(case):
+    season_ladder = case.new_ladder()
+    results = case.results()
+
+    def run():
+        for round_no, result in results:
+            season_ladder.record_result(result)
+        return len(results)
+
+    return run
+
+
+def bench_sort_ladder(case):
+    season_ladder = case.new_ladder()
+    for round_no, result in case.results():
+        season_ladder.record_result(result)
+
+    def run():
+        season_ladder.sort_ladder()
+        return len(case.teams)
+
+    return run
+
+
+def bench_elimination(case):
+    # Use the largest power of two number of finalists the league allows.
+    top_teams = 2 ** (min(len(case.teams), case.budget).bit_length() - 1)
+    season_ladder = case.new_ladder()
+    league = case.league()
+
+    def run():
+        ladder.elimination(case.game, {'top_teams': top_teams},
+                           season_ladder, league=league, seed=0)
+        return top_teams - 1
+
+    return run
+
+
+def bench_output(case, extension):
+    # Import the binary writer before timing, as output_data imports it
+    # lazily.
+    if extension == ladder.binary_extension:
+        importlib.import_module('columnar')
+
+    results = case.results()
+    names = case.new_ladder().names
+    handle, filename = tempfile.mkstemp(suffix=extension)
+    os.close(handle)
+
+    def run():
+        try:
+            with ladder.output_data(filename, case.game['stats'],
+                                    names) as writer:
+                for round_no, result in results:
+                    writer.store(result, round_no)
+        finally:
+            os.remove(filename)
+        return len(results)
+
+    return run
+
+
+def benchmarks(game_names):
+    '''Return a list of (name, benchmark) pairs to run.'''
+    selected = [('round_robin', bench_fixture)]
+
+    for game_name in game_names:
+        selected.append(('play ' + game_name,
+                         lambda case, name=game_name: bench_play(case, name)))
+
+        if ladder.batch_available and 'batch_function' in sports.games[game_name]:
+            selected.append(('play_round ' + game_name,
+                             lambda case, name=game_name:
+                             bench_play_round(case, name)))
+
+    selected.extend([('record_result', bench_record_result),
+                     ('sort_ladder', bench_sort_ladder),
+                     ('elimination', bench_elimination),
+                     ('output_data csv',
+                      lambda case: bench_output(case, '.csv'))])
+
+    if ladder.batch_available:
+        selected.append(('output_data binary',
+                         lambda case: bench_output(case,
+                                                   ladder.binary_extension)))
+
+    return selected
+
+
+def measure(benchmark, case, repeat, memory=True):
+    '''Run a benchmark repeat times, returning the number of matches, the
+    fastest time in seconds and the peak memory in bytes (or None).'''
+    best = None
+
+    for _ in range(repeat):
+        run = benchmark(case)
+        start = time.perf_counter()
+        matches = run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    peak = None
+    if memory:
+        run = benchmark(case)
+        tracemalloc.start()
+        try:
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return matches, best, peak
+
+
+def run_benchmarks(sizes=default_sizes, revolutions=default_revolutions,
+                   budget=default_budget, repeat=3, memory=True,
+                   game_names=None, only=None, progress=None):
+    '''Run every benchmark for each league size and number of revolutions,
+    returning a list of result dictionaries.'''
+    game_names = list(sports.games) if game_names is None else game_names
+    results = []
+
+    for size in sizes:
+        for revolution_count in revolutions:
+            case = Case(size, revolution_count, sports.games['Cricket'],
+                        budget)
+
+            for name, benchmark in benchmarks(game_names):
+                if only is not None and name not in only:
+                    continue
+
+                matches, seconds, peak = measure(benchmark, case, repeat,
+                                                 memory)
+                result = {'benchmark': name,
+                          'teams': size,
+                          'revolutions': revolution_count,
+                          'matches': matches,
+                          'seconds': seconds,
+                          'matches_per_second': matches / seconds if seconds else None,
+                          'peak_memory': peak}
+                results.append(result)
+
+                if progress is not None:
+                    progress(result)
+
+    return results
+
+
+def result_key(result):
+    return (result['benchmark'], result['teams'], result['revolutions'])
+
+
+def format_rate(rate):
+    return '-' if rate is None else '{:,.0f}'.format(rate)
+
+
+def format_memory(size):
+    return '-' if size is None else '{:,.1f} KiB'.format(size / 1024)
+
+
+def report(results, baseline=None):
+    '''Return a matrix of results, compared with a list of baseline results
+    if one is given.'''
+    header = ['Benchmark', 'Teams', 'Revolutions', 'Matches', 'Matches/s',
+              'Peak Memory']
+    if baseline is not None:
+        header.extend(['Baseline Matches/s', 'Change'])
+        baseline = {result_key(result): result for result in baseline}
+
+    matrix = [header]
+    for result in results:
+        row = [result['benchmark'], str(result['teams']),
+               str(result['revolutions']), str(result['matches']),
+               format_rate(result['matches_per_second']),
+               format_memory(result['peak_memory'])]
+
+        if baseline is not None:
+            previous = baseline.get(result_key(result))
+            if previous is None or not previous['matches_per_second'] \
+                    or result['matches_per_second'] is None:
+                row.extend(['-', '-'])
+            else:
+                change = (result['matches_per_second']
+                          / previous['matches_per_second'] - 1)
+                row.extend([format_rate(previous['matches_per_second']),
+                            '{:+.1%}'.format(change)])
+
+        matrix.append(row)
+
+    return matrix
+
+
+def regressions(results, baseline, tolerance):
+    '''Return the results which are more than tolerance (a fraction) slower
+    than their baseline.'''
+    baseline = {result_key(result): result for result in baseline}
+    slower = []
+
+    for result in results:
+        previous = baseline.get(result_key(result))
+        if previous is None or not previous['matches_per_second'] \
+                or result['matches_per_second'] is None:
+            continue
+        if result['matches_per_second'] < previous['matches_per_second'] * (1 - tolerance):
+            slower.append(result)
+
+    return slower
+
+
+def environment():
+    return {'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'numpy': ladder.batch_available}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description='Benchmark fixture generation, match play, ladder '
+                    'updates, finals and result output.')
+
+    parser.add_argument('--sizes', type=int, nargs='+', default=default_sizes,
+                        help='league sizes (default: %(default)s)')
+    parser.add_argument('--revolutions', type=int, nargs='+',
+                        default=default_revolutions,
+                        help='round-robin revolutions (default: %(default)s)')
+    parser.add_argument('--budget', type=int, default=default_budget,
+                        help='most matches played by one benchmark '
+                             '(default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='times each benchmark is timed, keeping the '
+                             'fastest (default: %(default)s)')
+    parser.add_argument('--sport', action='append', choices=sports.games,
+                        help='sport to benchmark; may be repeated '
+                             '(default: all)')
+    parser.add_argument('--only', action='append', metavar='BENCHMARK',
+                        help='run only the named benchmark; may be repeated')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='do not measure peak memory')
+    parser.add_argument('--json', metavar='FILE',
+                        help='save the results as JSON')
+    parser.add_argument('--baseline', metavar='FILE',
+                        help='compare against results saved with --json')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='fraction slower than the baseline counted as a '
+                             'regression (default: %(default)s)')
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    def progress(result):
+        print('{benchmark}, {teams} teams, {revolutions} revolutions: '
+              '{rate} matches/s'.format(
+                  rate=format_rate(result['matches_per_second']), **result),
+              file=sys.stderr)
+
+    results = run_benchmarks(args.sizes, args.revolutions, args.budget,
+                             args.repeat, not args.no_memory, args.sport,
+                             args.only, progress)
+
+    baseline = None
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+
+    print(format_table(report(results, baseline)))
+
+    if args.json is not None:
+        with open(args.json, 'w') as f:
+            json.dump({'environment': environment(),
+                       'budget': args.budget,
+                       'results': results}, f, indent=2)
+
+    if baseline is not None:
+        slower = regressions(results, baseline, args.tolerance)
+        if slower:
+            print('\n{} benchmark(s) more than {:.0%} slower than the '
+                  'baseline.'.format(len(slower), args.tolerance),
+                  file=sys.stderr)
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
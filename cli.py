@@ -0,0 +1,191 @@
+'''Run a simulation from the command line, without the GUI.
+
+For example,
+    python cli.py data.csv --sport Cricket --setting max_runs=200 --seed 1
+
+Only the standard library, ladder and sports are imported at start-up, so
+short scripted runs start quickly. Plugins are found without being imported,
+and only the selected ones are imported.'''
+
+import argparse
+import os
+import sys
+
+import ladder
+import plugins
+import sports
+
+
+def parse_settings(pairs, defaults):
+    '''Return a copy of defaults updated with a list of KEY=VALUE strings.'''
+    settings = dict(defaults)
+
+    for pair in pairs:
+        key, separator, value = pair.partition('=')
+        if not separator:
+            raise ValueError('Setting ' + pair + ' is not of the form KEY=VALUE!')
+        if key not in settings:
+            raise ValueError('Unknown setting ' + key + '!')
+        settings[key] = value
+
+    return settings
+
+
+def format_table(matrix):
+    '''Format a matrix, with a header row, as aligned plain text.'''
+    widths = [max(len(str(row[column])) for row in matrix)
+              for column in range(len(matrix[0]))]
+
+    lines = []
+    for index, row in enumerate(matrix):
+        lines.append('  '.join(str(item).ljust(width)
+                               for item, width in zip(row, widths)).rstrip())
+        if index == 0:
+            lines.append('  '.join('-' * width for width in widths))
+
+    return '\n'.join(lines)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description='Simulate a season and finals series of a league.')
+
+    parser.add_argument('teams', help='CSV file of teams, with a header row')
+    parser.add_argument('--sport', default='Cricket', choices=sports.games,
+                        help='sport to simulate (default: %(default)s)')
+    parser.add_argument('--setting', action='append', default=[],
+                        metavar='KEY=VALUE', help='sport setting')
+    parser.add_argument('--structure', default='Round Robin',
+                        choices=ladder.tournament_structures,
+                        help='tournament structure (default: %(default)s)')
+    parser.add_argument('--structure-setting', action='append', default=[],
+                        metavar='KEY=VALUE', help='tournament structure setting')
+    parser.add_argument('--finals', default='Elimination',
+                        choices=ladder.finals_structures,
+                        help='finals structure (default: %(default)s)')
+    parser.add_argument('--finals-setting', action='append', default=[],
+                        metavar='KEY=VALUE', help='finals structure setting')
+    parser.add_argument('--seed', help='random seed, for reproducible runs')
+    parser.add_argument('--output', default='out.csv',
+                        help='results file; use a .results extension for the '
+                             'binary format (default: %(default)s)')
+    parser.add_argument('--batch', action='store_true',
+                        help="play rounds with the sport's NumPy batch "
+                             'function, which is faster for large leagues '
+                             'but slower to start')
+    parser.add_argument('--quiet', action='store_true',
+                        help='do not print the finals matches, final ladder '
+                             'or finals table')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='play the main season in this many worker '
+                             'processes, with the same results as one '
+                             '(default: %(default)s)')
+    parser.add_argument('--analytic', action='store_true',
+                        help="compute each team's exact distribution of "
+                             'points and approximate chance of making the '
+                             'finals, without simulating; needs NumPy and a '
+                             'sport which supports it')
+    parser.add_argument('--profile', action='store_true',
+                        help='time each phase of the simulation and print a '
+                             'summary')
+    parser.add_argument('--checkpoint', metavar='FILE',
+                        help='save the state of the season to this file as it '
+                             'is played')
+    parser.add_argument('--checkpoint-rounds', type=int, default=10,
+                        metavar='N',
+                        help='rounds between checkpoints (default: '
+                             '%(default)s)')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue the season from the checkpoint, with '
+                             'the same results as an uninterrupted run')
+
+    return parser
+
+
+def main(argv=None):
+    # Plugins must be found first, as their names are choices of the parser.
+    try:
+        plugins.load()
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 2
+
+    args = build_parser().parse_args(argv)
+
+    try:
+        game = dict(plugins.resolve(sports.games[args.sport]))
+        game['settings'] = parse_settings(args.setting, game['settings'])
+
+        structure = dict(plugins.resolve(
+            ladder.tournament_structures[args.structure]))
+        structure['settings'] = parse_settings(args.structure_setting,
+                                               structure['settings'])
+
+        finals = dict(plugins.resolve(ladder.finals_structures[args.finals]))
+        finals['settings'] = parse_settings(args.finals_setting,
+                                            finals['settings'])
+
+        teams = ladder.read_teams(args.teams, game['parameters'])
+    except (ValueError, ImportError, AttributeError) as error:
+        print(error, file=sys.stderr)
+        return 2
+
+    if args.analytic:
+        import analytic
+        try:
+            analysis = analytic.analyse(teams, game, structure, finals)
+        except ValueError as error:
+            print(error, file=sys.stderr)
+            return 2
+        print(format_table(analysis.matrix()))
+        return 0
+
+    options = {'checkpoint': args.checkpoint,
+               'checkpoint_rounds': args.checkpoint_rounds,
+               'resume': args.resume,
+               'verbose': not args.quiet}
+
+    try:
+        if args.workers > 1:
+            from sharded import ShardedSimulation
+            simulation = ShardedSimulation(teams, game, structure, finals,
+                                           seed=args.seed, output=args.output,
+                                           instrument=args.profile,
+                                           workers=args.workers, **options)
+        else:
+            simulation = ladder.Simulation(teams, game, structure, finals,
+                                           seed=args.seed, output=args.output,
+                                           batch=args.batch,
+                                           instrument=args.profile, **options)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 2
+
+    try:
+        for status in simulation.simulate_season():
+            season_ladder = status
+
+        report = simulation.simulate_finals()
+    except Exception as error:
+        # Keep the results of a checkpointed run, as --resume continues them.
+        if args.checkpoint is None or not os.path.exists(args.checkpoint):
+            simulation.discard()
+
+        print('Simulation failed: ' + str(error), file=sys.stderr)
+        return 2 if isinstance(error, ValueError) else 1
+
+    if not args.quiet:
+        print(format_table(season_ladder.matrix()))
+        print()
+        print(format_table(report))
+
+    if args.profile:
+        if not args.quiet:
+            print()
+        print(format_table(simulation.instrumentation.matrix()))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
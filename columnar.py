@@ -0,0 +1,348 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+from ladder import DRAW, WIN, LOSS, BaseLadder
+
+# Binary results files start with this marker, followed by the position and
+# length of the trailer. Records start at records_offset.
+binary_magic = b'LADDERRS'
+records_offset = 64
+
+
+class ColumnarLadder(BaseLadder):
+    '''A ladder storing each statistic as an integer array indexed by team id.
+
+    It can be used anywhere a Ladder is, and additionally accepts whole
+    rounds or seasons of results at once through record_results.'''
+
+    def init_ladder(self, teams):
+        '''Create a blank ladder with W/L/D/P columns and a team id for each
+        team, in the order the teams are given.'''
+        self.names = list(teams)
+        self.ids = {name: index for index, name in enumerate(self.names)}
+
+        size = len(self.names)
+        self.columns = {'Win': np.zeros(size, dtype=np.int64),
+                        'Loss': np.zeros(size, dtype=np.int64),
+                        'Draw': np.zeros(size, dtype=np.int64),
+                        'Points': np.zeros(size, dtype=np.int64)}
+
+        # Alphabetical rank of each name, for use as a tie-breaker.
+        self.name_rank = np.empty(size, dtype=np.int64)
+        self.name_rank[np.argsort(np.array(self.names, dtype=object),
+                                  kind='stable')] = np.arange(size)
+
+    def update_entry(self, index, field, result):
+        '''Add a result to the columns of the team with a given id.'''
+        self.columns[field][index] += 1
+        self.columns['Points'][index] += self.points[result]
+
+    def record_results(self, batch):
+        '''Record a batch of results in one pass. The batch is a tuple of
+        arrays (results, winners, losers), where results holds WIN or DRAW
+        for each match and winners and losers hold team ids. Any further
+        elements, such as statistics, are ignored.'''
+        results, winners, losers = (np.asarray(column) for column in batch[:3])
+
+        if not np.isin(results, (WIN, DRAW)).all():
+            raise ValueError('Result type not supported!')
+
+        size = len(self.names)
+        won = results == WIN
+        drawn = ~won
+
+        wins = np.bincount(winners[won], minlength=size)
+        losses = np.bincount(losers[won], minlength=size)
+        draws = (np.bincount(winners[drawn], minlength=size)
+                 + np.bincount(losers[drawn], minlength=size))
+
+        self.columns['Win'] += wins
+        self.columns['Loss'] += losses
+        self.columns['Draw'] += draws
+        self.columns['Points'] += (wins * self.points[WIN]
+                                   + losses * self.points[LOSS]
+                                   + draws * self.points[DRAW])
+
+    def record_tallies(self, tallies):
+        '''Record many results at once, given as a dictionary mapping team
+        ids to their numbers of wins, losses and draws.'''
+        if not tallies:
+            return
+
+        team_ids = np.fromiter(tallies, dtype=np.int64, count=len(tallies))
+        wins, losses, draws = np.array(list(tallies.values()),
+                                       dtype=np.int64).T
+
+        self.columns['Win'][team_ids] += wins
+        self.columns['Loss'][team_ids] += losses
+        self.columns['Draw'][team_ids] += draws
+        self.columns['Points'][team_ids] += (wins * self.points[WIN]
+                                             + losses * self.points[LOSS]
+                                             + draws * self.points[DRAW])
+
+    def tallies(self):
+        '''Return the wins, losses and draws of each team which has played,
+        in the form taken by record_tallies.'''
+        wins = self.columns['Win']
+        losses = self.columns['Loss']
+        draws = self.columns['Draw']
+
+        return {int(team_id): (int(wins[team_id]), int(losses[team_id]),
+                               int(draws[team_id]))
+                for team_id in np.flatnonzero(wins + losses + draws)}
+
+    def order(self):
+        '''Return team ids in ladder order. Teams are ranked by points, then
+        by each tie-breaker in turn (higher values first, except Name which
+        is alphabetical), then by their original position.'''
+        keys = [-self.columns['Points']]
+
+        for field in self.tie_breakers:
+            if field == 'Name':
+                keys.append(self.name_rank)
+            else:
+                keys.append(-self.columns[field])
+
+        keys.append(np.arange(len(self.names)))
+
+        # lexsort treats the last key as the primary one.
+        return np.lexsort(keys[::-1])
+
+    def ordered(self, n=None):
+        '''Return the first n ladder entries in order, or all of them, as
+        dictionaries in the same form as a Ladder.'''
+        order = self.order()[:n]
+        columns = {field: column[order].tolist()
+                   for field, column in self.columns.items()}
+
+        entries = []
+        for position, index in enumerate(order.tolist()):
+            entry = {'Name': self.names[index]}
+            for field in ('Win', 'Loss', 'Draw', 'Points'):
+                entry[field] = columns[field][position]
+            entries.append(entry)
+
+        return entries
+
+
+
+class BinaryResultWriter:
+    '''Write results to a compact binary file, for seasons too large to
+    write or read back as CSV.
+
+    The file starts with a fixed header holding the position and length of
+    a JSON trailer. Results follow as fixed-width records, written in chunks
+    of buffer_size, with a round, result type, winner id and loser id, then
+    one column per statistic. Numeric statistics are stored as numbers,
+    others as codes into a table of distinct values. The trailer holds the
+    team names for each id, those tables, the record layout and the number
+    of records, and is rewritten when the file is closed.
+
+    Season rounds are stored as their number. Other round labels, such as
+    finals rounds, are stored as -1 - their index in a table of labels.'''
+
+    buffer_size = 65536
+
+    def __init__(self, filename, stats, names, append=False, checkpoint=None):
+        self.stats = list(stats)
+        self.names = list(names)
+        self.buffer = []
+        self.rows_written = 0
+
+        self.strings = {}
+        self.round_labels = {}
+        self.stat_types = {}
+        self.dtype = None
+
+        if checkpoint is not None:
+            self.file = open(filename, 'r+b')
+            self.restore(checkpoint['trailer'], checkpoint['offset'])
+        elif append and os.path.exists(filename) and os.path.getsize(filename):
+            self.file = open(filename, 'r+b')
+            self.resume()
+        else:
+            self.file = open(filename, 'w+b')
+            self.file.write(bytes(records_offset))
+
+    def resume(self):
+        '''Load the trailer of an existing file and position the file to add
+        records in place of it.'''
+        offset, trailer = read_trailer(self.file)
+        self.restore(trailer, offset)
+
+    def restore(self, trailer, offset):
+        '''Take the tables and layout from a trailer, and position the file to
+        add records from offset, discarding anything after it.'''
+        if trailer['stats'] != self.stats or trailer['teams'] != self.names:
+            raise ValueError('Results file has different teams or stats!')
+
+        self.strings = {stat: {value: index for index, value
+                               in enumerate(values)}
+                        for stat, values in trailer['strings'].items()}
+        self.round_labels = {label: index for index, label
+                             in enumerate(trailer['round_labels'])}
+        self.stat_types = trailer['stat_types']
+        if self.stat_types:
+            self.dtype = record_dtype(self.stats, self.stat_types)
+        self.rows_written = trailer['rows']
+
+        self.file.seek(offset)
+        self.file.truncate()
+
+    def start(self, result):
+        '''Fix the record layout from the first result.'''
+        self.stat_types = {}
+        for stat, value in zip(self.stats, result.stats):
+            if isinstance(value, (int, np.integer)):
+                self.stat_types[stat] = 'int'
+            elif isinstance(value, (float, np.floating)):
+                self.stat_types[stat] = 'float'
+            else:
+                self.stat_types[stat] = 'string'
+
+        self.dtype = record_dtype(self.stats, self.stat_types)
+
+    def encode(self, table, value):
+        '''Return the code for value in table, adding it if necessary.'''
+        code = table.get(value)
+        if code is None:
+            code = table[value] = len(table)
+        return code
+
+    def store(self, result, round_no):
+        '''Encode a MatchResult as a record and add it to the buffer.'''
+        if self.dtype is None:
+            self.start(result)
+
+        if isinstance(round_no, int):
+            round_code = round_no
+        else:
+            round_code = -1 - self.encode(self.round_labels, round_no)
+
+        record = [round_code, result.result, result.winner, result.loser]
+
+        for stat, value in zip(self.stats, result.stats):
+            if self.stat_types[stat] == 'string':
+                value = self.encode(self.strings.setdefault(stat, {}), value)
+            record.append(value)
+
+        self.buffer.append(tuple(record))
+
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        '''Write all buffered records to the file as one chunk.'''
+        if self.buffer:
+            self.file.write(np.array(self.buffer, dtype=self.dtype).tobytes())
+            self.rows_written += len(self.buffer)
+            self.buffer = []
+
+        self.file.flush()
+
+    def trailer(self):
+        return {'stats': self.stats,
+                'stat_types': self.stat_types,
+                'teams': self.names,
+                'strings': {stat: list(values)
+                            for stat, values in self.strings.items()},
+                'round_labels': list(self.round_labels),
+                'rows': self.rows_written}
+
+    def checkpoint(self):
+        '''Write all buffered records to disk and return the state needed to
+        continue the file from this point. The trailer is only written when
+        the file is closed, so it is kept in the state instead.'''
+        self.flush()
+        os.fsync(self.file.fileno())
+        return {'offset': self.file.tell(), 'trailer': self.trailer()}
+
+    def close(self):
+        self.flush()
+
+        encoded = json.dumps(self.trailer()).encode('utf-8')
+
+        offset = self.file.tell()
+        self.file.write(encoded)
+
+        self.file.seek(0)
+        self.file.write(binary_magic + struct.pack('<QQ', offset, len(encoded)))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class BinaryResults:
+    '''Results read from a file written by BinaryResultWriter. The records
+    are memory-mapped, and each column is a zero-copy NumPy view of them.'''
+
+    def __init__(self, filename):
+        with open(filename, 'rb') as f:
+            offset, trailer = read_trailer(f)
+
+        self.stats = trailer['stats']
+        self.teams = trailer['teams']
+        self.strings = trailer['strings']
+        self.round_labels = trailer['round_labels']
+
+        self.dtype = record_dtype(trailer['stats'], trailer['stat_types'])
+
+        if trailer['rows']:
+            self.records = np.memmap(filename, dtype=self.dtype, mode='r',
+                                     offset=records_offset,
+                                     shape=(trailer['rows'],))
+        else:
+            self.records = np.zeros(0, dtype=self.dtype)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, column):
+        '''Return a column (Round, Result, Winner, Loser or a statistic).'''
+        return self.records[column]
+
+    def round_label(self, code):
+        '''Return the round label stored as code.'''
+        return code if code >= 0 else self.round_labels[-1 - code]
+
+    def team_name(self, team_id):
+        return self.teams[team_id]
+
+
+def record_dtype(stats, stat_types):
+    '''Return the NumPy record type for results with the given statistics.'''
+    fields = [('Round', '<i4'), ('Result', 'u1'),
+              ('Winner', '<u4'), ('Loser', '<u4')]
+
+    for stat in stats:
+        fields.append((stat, {'int': '<i8', 'float': '<f8',
+                              'string': '<u4'}[stat_types.get(stat, 'int')]))
+
+    return np.dtype(fields)
+
+
+def read_trailer(f):
+    '''Read the header of a binary results file, returning the trailer's
+    position and its contents.'''
+    f.seek(0)
+    header = f.read(len(binary_magic) + 16)
+
+    if header[:len(binary_magic)] != binary_magic:
+        raise ValueError('Not a binary results file!')
+
+    offset, length = struct.unpack('<QQ', header[len(binary_magic):])
+
+    f.seek(offset)
+    return offset, json.loads(f.read(length).decode('utf-8'))
+
+
+def load_results(filename):
+    '''Memory-map a binary results file.'''
+    return BinaryResults(filename)
@@ -0,0 +1,190 @@
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import ladder
+import sports
+
+# Number of pieces each worker's share of seasons is split into, so that
+# workers which finish early can pick up remaining work.
+chunks_per_worker = 4
+
+
+class Forecast:
+    '''Tallies of ladder positions, finals appearances and premierships for
+    each team over many simulated seasons.'''
+
+    def __init__(self, teams):
+        self.seasons = 0
+        self.positions = {team: [0] * len(teams) for team in teams}
+        self.finals = {team: 0 for team in teams}
+        self.premierships = {team: 0 for team in teams}
+
+    def record(self, ladder_order, finalists, premiers):
+        '''Add one season, given the final ladder order as a list of names,
+        the teams which qualified for finals and the premiers (or None if
+        the finals did not produce a single winner).'''
+        self.seasons += 1
+
+        for position, team in enumerate(ladder_order):
+            self.positions[team][position] += 1
+
+        for team in finalists:
+            self.finals[team] += 1
+
+        if premiers is not None:
+            self.premierships[premiers] += 1
+
+    def merge(self, other):
+        '''Add the tallies of another forecast of the same teams.'''
+        self.seasons += other.seasons
+
+        for team, counts in other.positions.items():
+            self.positions[team] = [a + b for a, b
+                                    in zip(self.positions[team], counts)]
+            self.finals[team] += other.finals[team]
+            self.premierships[team] += other.premierships[team]
+
+        return self
+
+    def probabilities(self):
+        '''Return, for each team, the probability of finishing in each ladder
+        position, of making the finals and of winning the premiership.'''
+        seasons = max(self.seasons, 1)
+
+        return {team: {'Positions': [count / seasons for count in counts],
+                       'Finals': self.finals[team] / seasons,
+                       'Premiership': self.premierships[team] / seasons}
+                for team, counts in self.positions.items()}
+
+    def matrix(self):
+        '''Return matrix to display as table, ordered by expected ladder
+        position.'''
+        probabilities = self.probabilities()
+
+        def expected_position(team):
+            return sum((position + 1) * p for position, p
+                       in enumerate(probabilities[team]['Positions']))
+
+        forecast_matrix = [['Name', 'Average Position', 'Finals',
+                            'Premiership']]
+        for team in sorted(probabilities, key=expected_position):
+            forecast_matrix.append([team,
+                                    '{:.2f}'.format(expected_position(team)),
+                                    '{:.1%}'.format(probabilities[team]['Finals']),
+                                    '{:.1%}'.format(probabilities[team]['Premiership'])])
+        return forecast_matrix
+
+
+def simulate_once(teams, fixture, game, finals, tie_breakers=(),
+                  ladder_class=ladder.Ladder, seed=None, batch=False):
+    '''Play a single season and finals series on a private copy of teams,
+    without storing or printing any matches, using the game's batch
+    function if batch is True. Return the ladder order, the finalists and
+    the premiers.'''
+    league = {name: dict(attributes) for name, attributes in teams.items()}
+
+    season_ladder = ladder_class(len(fixture), league,
+                                 tie_breakers=tie_breakers)
+
+    if hasattr(fixture, 'attach'):
+        fixture.attach(season_ladder)
+
+    for round_number, round_matches in enumerate(fixture):
+        ladder.play_round(round_matches, game, season_ladder, league,
+                          seed=seed, round_no=round_number + 1, batch=batch)
+
+    ladder_order = [team['Name'] for team in season_ladder.ordered()]
+    # A top_teams of 0, as in a knockout, enters every team.
+    top_teams = finals['settings'].get('top_teams') or len(ladder_order)
+    finalists = ladder_order[:top_teams]
+
+    remaining, report = finals['function_name'](game, finals['settings'],
+                                                season_ladder, league=league,
+                                                seed=seed)
+    premiers = remaining[0] if len(remaining) == 1 else None
+
+    return ladder_order, finalists, premiers
+
+
+def forecast(seasons, teams=ladder.teams, game=sports.games['Cricket'],
+             structure=ladder.tournament_structures['Round Robin'],
+             finals=ladder.finals_structures['Elimination'],
+             ladder_class=ladder.Ladder, seed=None, first_season=0,
+             batch=False):
+    '''Simulate the given number of seasons and finals series, returning a
+    Forecast of each team's finishing positions. No results are written to
+    out.csv, and the given teams are not modified. If batch is True, the
+    game's batch function plays each round where it has one, which is
+    faster but draws from a different random stream.
+
+    If a seed is given, each season is seeded from it and its number
+    (counting from first_season), so any range of seasons can be simulated
+    separately and give the same result as one long run.'''
+
+    # Take copies with sanitised settings, leaving the given definitions
+    # unchanged.
+    game = ladder.copy_game(game)
+    structure = ladder.copy_definition(structure)
+    finals = ladder.copy_definition(finals)
+
+    # The fixture is the same every season, so it is only generated once.
+    fixture = structure['function_name'](teams, structure['settings'])
+    tie_breakers = ladder.parse_fields(structure['settings'])
+
+    result = Forecast(teams)
+
+    for season in range(first_season, first_season + seasons):
+        season_seed = None if seed is None else '{}:{}'.format(seed, season)
+        result.record(*simulate_once(teams, fixture, game, finals,
+                                     tie_breakers, ladder_class, season_seed,
+                                     batch))
+
+    return result
+
+
+def forecast_chunk(first_season, seasons, teams, game, structure, finals,
+                   ladder_class, seed, batch):
+    '''Run a range of seasons of a forecast in a worker process.'''
+    return forecast(seasons, teams, game, structure, finals, ladder_class,
+                    seed, first_season, batch)
+
+
+def split_seasons(seasons, chunks):
+    '''Split a number of seasons into at most chunks near-equal parts.'''
+    size, extra = divmod(seasons, chunks)
+    parts = [size + 1] * extra + [size] * (chunks - extra)
+    return [part for part in parts if part > 0]
+
+
+def parallel_forecast(seasons, teams=ladder.teams,
+                      game=sports.games['Cricket'],
+                      structure=ladder.tournament_structures['Round Robin'],
+                      finals=ladder.finals_structures['Elimination'],
+                      ladder_class=ladder.Ladder, workers=None, seed=None,
+                      batch=False):
+    '''Run forecast across a pool of worker processes and merge the
+    results. Each worker receives its own copy of the teams and settings,
+    and every season is seeded from seed and its number, so the result is
+    the same as forecast with the same seed however the work is split. If
+    no seed is given, one is chosen at random.'''
+    workers = workers or os.cpu_count() or 1
+
+    if seed is None:
+        seed = random.getrandbits(64)
+
+    parts = split_seasons(seasons, workers * chunks_per_worker)
+    starts = [sum(parts[:index]) for index in range(len(parts))]
+
+    result = Forecast(teams)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(forecast_chunk, start, part, teams, game,
+                                   structure, finals, ladder_class, seed,
+                                   batch)
+                   for start, part in zip(starts, parts)]
+
+        for future in futures:
+            result.merge(future.result())
+
+    return result
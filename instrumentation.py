@@ -0,0 +1,86 @@
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+
+class Instrumentation:
+    '''Wall time spent in each phase of a simulation, with counts of matches
+    played, rows written and bytes written to the results file.
+
+    Phases may be nested, and each phase's time excludes the phases started
+    inside it, so the times add up to the total. For example, the time of
+    the season phase does not include the sport function or the ladder.'''
+
+    def __init__(self):
+        self.times = {}
+        self.calls = {}
+        self.matches = 0
+        self.rows_written = 0
+        self.bytes_written = 0
+
+        # Stack of [phase, start time, time spent in nested phases].
+        self.active = []
+
+    def start(self, phase):
+        self.active.append([phase, time.perf_counter(), 0.0])
+
+    def stop(self):
+        phase, started, nested = self.active.pop()
+        elapsed = time.perf_counter() - started
+
+        self.times[phase] = self.times.get(phase, 0.0) + elapsed - nested
+        self.calls[phase] = self.calls.get(phase, 0) + 1
+
+        if self.active:
+            self.active[-1][2] += elapsed
+
+    @contextmanager
+    def phase(self, phase):
+        '''Time the body of a with statement as the given phase.'''
+        self.start(phase)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    def timed(self, phase, function):
+        '''Return function wrapped so that each call is timed as the given
+        phase.'''
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            self.start(phase)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.stop()
+
+        return wrapper
+
+    def total(self):
+        return sum(self.times.values())
+
+    def as_dict(self):
+        return {'times': dict(self.times),
+                'calls': dict(self.calls),
+                'matches': self.matches,
+                'rows_written': self.rows_written,
+                'bytes_written': self.bytes_written}
+
+    def matrix(self):
+        '''Return matrix to display as table, slowest phase first.'''
+        total = self.total()
+
+        instrumentation_matrix = [['Phase', 'Time (s)', 'Share', 'Calls']]
+        for phase in sorted(self.times, key=self.times.get, reverse=True):
+            instrumentation_matrix.append(
+                [phase,
+                 '{:.4f}'.format(self.times[phase]),
+                 '{:.1%}'.format(self.times[phase] / total if total else 0),
+                 str(self.calls[phase])])
+
+        instrumentation_matrix.append(['Total', '{:.4f}'.format(total), '', ''])
+        instrumentation_matrix.append(['Matches played', str(self.matches), '', ''])
+        instrumentation_matrix.append(['Rows written', str(self.rows_written), '', ''])
+        instrumentation_matrix.append(['Bytes written', str(self.bytes_written), '', ''])
+
+        return instrumentation_matrix
@@ -1,82 +1,115 @@
 import csv
 import math
-from operator import itemgetter
-from tabulate import tabulate
+import os
+import pickle
+import random
+from contextlib import nullcontext
+from importlib.util import find_spec
+from itertools import chain, islice, repeat
 
 import sports
+from instrumentation import Instrumentation
+from standings import SortedStandings
 
 DRAW = 0
 WIN = 1
 LOSS = 2
 
-output = []
+# Dummy team added to fixtures with an uneven number of teams. Its opponent
+# has a bye for that round.
+BYE = 'BYE'
+
 teams = {}
 
+# Batch functions need NumPy, which is optional. Without it, games are always
+# played match by match.
+batch_available = find_spec('numpy') is not None
+
+# Results written to files with this extension use the binary format.
+binary_extension = '.results'
+
+# Ladder statistics which may be used to break ties on points.
+ladder_fields = ['Win', 'Loss', 'Draw', 'Name']
+
+# Version of the checkpoints written by Simulation, which only resumes from
+# checkpoints of the same version.
+checkpoint_version = 1
+
+
+class MatchResult:
+    '''The result of a single match. The winner and loser are team ids, as
+    given by a ladder's ids dictionary, and stats holds the game's statistics
+    in the order of its 'stats' list. In a draw, either team may be the
+    winner. Names and formatted rows are only produced when writing.'''
+
+    __slots__ = ('result', 'winner', 'loser', 'stats')
+
+    def __init__(self, result, winner, loser, stats=()):
+        self.result = result
+        self.winner = winner
+        self.loser = loser
+        self.stats = stats
 
-class Ladder:
+    def stats_dict(self, stat_names):
+        '''Return the statistics as a dictionary keyed by stat_names.'''
+        return dict(zip(stat_names, self.stats))
 
-    def __init__(self, rounds, teams, points={WIN: 2, DRAW: 1, LOSS: 0}):
+
+class BaseLadder:
+    '''The parts of a ladder shared by Ladder and columnar.ColumnarLadder.
+    They are built on each ladder's ids, mapping team names to team ids, and
+    its update_entry and ordered methods, so that both ladders record and
+    display results in the same way.'''
+
+    def __init__(self, rounds, teams, points={WIN: 2, DRAW: 1, LOSS: 0},
+                 tie_breakers=()):
         self.rounds = rounds
         self.points = points
-        self.init_ladder(teams)
+        self.tie_breakers = list(tie_breakers)
 
-    def init_ladder(self, teams):
-        '''Create a blank ladder with an entry for each team, including W/L/D/P
-        statistics'''
-        self.ladder = []
+        for field in self.tie_breakers:
+            if field not in ladder_fields:
+                raise ValueError('Tie-breaker ' + str(field) + ' not supported!')
 
-        for team in teams:
-            entry = {}
-            entry['Name'] = team
-            entry['Win'] = 0
-            entry['Loss'] = 0
-            entry['Draw'] = 0
-            entry['Points'] = 0
-            self.ladder.append(entry)
+        self.init_ladder(teams)
+
+    def team_id(self, name):
+        '''Get the id of a team by a given name.'''
+        try:
+            return self.ids[name]
+        except KeyError:
+            raise KeyError('Team ' + str(name) + ' not found in ladder!')
 
     def record_result(self, result):
-        if result[0] == WIN:
-            self.record_win(result[1])
-            self.record_loss(result[2])
-        elif result[0] == DRAW:
-            self.record_draw(result[1])
-            self.record_draw(result[2])
+        '''Record a MatchResult.'''
+        if result.result == WIN:
+            self.update_entry(result.winner, 'Win', WIN)
+            self.update_entry(result.loser, 'Loss', LOSS)
+        elif result.result == DRAW:
+            self.update_entry(result.winner, 'Draw', DRAW)
+            self.update_entry(result.loser, 'Draw', DRAW)
         else:
             raise ValueError('Result type not supported!')
 
-    def team_index(self, name):
-        '''Get the index of a team in the ladder by a given name.'''
-        for index, team in enumerate(self.ladder):
-            if team['Name'] == name:
-                return index
-        else:
-            raise KeyError('Team ' + str(name) + ' not found in ladder!')
-
     def record_win(self, team):
-        self.ladder[self.team_index(team)]['Win'] += 1
-        self.ladder[self.team_index(team)]['Points'] += self.points[WIN]
+        self.update_entry(self.team_id(team), 'Win', WIN)
 
     def record_loss(self, team):
-        self.ladder[self.team_index(team)]['Loss'] += 1
-        self.ladder[self.team_index(team)]['Points'] += self.points[LOSS]
+        self.update_entry(self.team_id(team), 'Loss', LOSS)
 
     def record_draw(self, team):
-        self.ladder[self.team_index(team)]['Draw'] += 1
-        self.ladder[self.team_index(team)]['Points'] += self.points[DRAW]
-
-    def sort_ladder(self):
-        self.ladder.sort(key=itemgetter('Points'), reverse=True)
+        self.update_entry(self.team_id(team), 'Draw', DRAW)
 
     def top(self, n):
         '''Return top n teams in ladder.'''
-        self.sort_ladder()
-        return self.ladder[:n]
+        return self.ordered(n)
 
-    def matrix(self):
-        '''Return matrix to display as table.'''
-        self.sort_ladder()
+    def matrix(self, start=0, stop=None):
+        '''Return matrix to display as table, with the header and the ladder
+        positions from start up to, but not including, stop (counting from
+        zero), or all of them.'''
         ladder_matrix = [['Name', 'Win', 'Loss', 'Draw', 'Points']]
-        for row in self.ladder:
+        for row in self.ordered(stop)[start:]:
             ladder_matrix.append([row['Name'],
                                   str(row['Win']),
                                   str(row['Loss']),
@@ -85,10 +118,12 @@ class Ladder:
         return ladder_matrix
 
     def print_ladder(self):
-        self.sort_ladder()
+        # tabulate is only needed here, so it is not imported at start-up.
+        from tabulate import tabulate
+
         printable = [['Name', 'Win', 'Loss', 'Draw', 'Points']]
 
-        for row in self.ladder:
+        for row in self.ordered():
             printable.append([row['Name'],
                               row['Win'],
                               row['Loss'],
@@ -98,18 +133,148 @@ class Ladder:
         print(tabulate(printable, headers='firstrow'))
 
 
-def play(team1, team2, game, ladder=None):
-    '''Return the result of a match played between two teams according to
-    the rules of a given game. If a ladder is supplied, the result is
-    recorded in the ladder.'''
+class Ladder(BaseLadder):
+
+    def init_ladder(self, teams):
+        '''Create a blank ladder with an entry for each team, including W/L/D/P
+        statistics. Each team is given an id, its position in the order teams
+        are given, which indexes its entry in self.entries so that results can
+        be recorded without searching the ladder.'''
+        self.ladder = []
+        self.ids = {}
+        self.names = list(teams)
+
+        for team in teams:
+            entry = {}
+            entry['Name'] = team
+            entry['Win'] = 0
+            entry['Loss'] = 0
+            entry['Draw'] = 0
+            entry['Points'] = 0
+            self.ids[team] = len(self.ladder)
+            self.ladder.append(entry)
+
+        # Keep the ladder order up to date as results come in, rather than
+        # sorting every time the ladder is read.
+        self.entries = list(self.ladder)
+        self.order = SortedStandings(self.sort_key(entry)
+                                     for entry in self.ladder)
+
+    def sort_key(self, entry):
+        '''Return the key ordering a ladder entry. Teams are ranked by points,
+        then by each tie-breaker in turn (higher values first, except Name
+        which is alphabetical), then by their original position.'''
+        key = [-entry['Points']]
+
+        for field in self.tie_breakers:
+            if field == 'Name':
+                key.append(entry['Name'])
+            else:
+                key.append(-entry[field])
+
+        key.append(self.ids[entry['Name']])
+        return tuple(key)
+
+    def team_entry(self, name):
+        '''Get the ladder entry of a team by a given name.'''
+        return self.entries[self.team_id(name)]
+
+    def team_index(self, name):
+        '''Get the index of a team in the ladder by a given name.'''
+        return self.ladder.index(self.team_entry(name))
+
+    def record_tallies(self, tallies):
+        '''Record many results at once, given as a dictionary mapping team
+        ids to their numbers of wins, losses and draws. Each team is moved
+        once, however many results it has.'''
+        for team_id, (wins, losses, draws) in tallies.items():
+            entry = self.entries[team_id]
+            self.order.remove(self.sort_key(entry))
+
+            entry['Win'] += wins
+            entry['Loss'] += losses
+            entry['Draw'] += draws
+            entry['Points'] += (wins * self.points[WIN]
+                                + losses * self.points[LOSS]
+                                + draws * self.points[DRAW])
+
+            self.order.add(self.sort_key(entry))
+
+    def tallies(self):
+        '''Return the wins, losses and draws of each team which has played,
+        in the form taken by record_tallies.'''
+        return {team_id: (entry['Win'], entry['Loss'], entry['Draw'])
+                for team_id, entry in enumerate(self.entries)
+                if entry['Win'] or entry['Loss'] or entry['Draw']}
+
+    def update_entry(self, index, field, result):
+        '''Add a result to the entry of the team with a given id, moving it to
+        its new position.'''
+        entry = self.entries[index]
+        self.order.remove(self.sort_key(entry))
+
+        entry[field] += 1
+        entry['Points'] += self.points[result]
+
+        self.order.add(self.sort_key(entry))
+
+    def ordered(self, n=None):
+        '''Return the first n ladder entries in order, or all of them.'''
+        keys = self.order if n is None else self.order.first(n)
+        return [self.entries[key[-1]] for key in keys]
+
+    def sort_ladder(self):
+        self.ladder = self.ordered()
+
+
+def match_rng(seed, round_no, match_no):
+    '''Return a random number generator for a single match, derived from the
+    simulation seed, the round and the match's position in the round. Any
+    match can be replayed on its own from these values, and the stream does
+    not depend on which process plays the match or in what order.'''
+    return random.Random('{}:{}:{}'.format(seed, round_no, match_no))
+
+
+def match_result(result, ids, stat_names):
+    '''Convert a result tuple returned by a game into a MatchResult, using
+    ids to look up team ids and keeping the statistics in stat_names.'''
+    stats = result[3]
+    return MatchResult(result[0], ids[result[1]], ids[result[2]],
+                       tuple([stats[stat] for stat in stat_names]))
+
+
+def play(team1, team2, game, ladder=None, league=None, rng=None, ids=None):
+    '''Return the MatchResult of a match played between two teams according
+    to the rules of a given game. If a ladder is supplied, the result is
+    recorded in the ladder. If a league (a teams dictionary) is supplied, it
+    is played in place of the global teams, which are left untouched. If rng
+    is supplied, the game draws its random numbers from it. Teams in the
+    result are identified using ids, which defaults to the ladder's ids.'''
+
+    if ids is None:
+        if ladder is None:
+            raise ValueError('A ladder or team ids must be supplied!')
+        ids = ladder.ids
 
     global teams
 
+    options = {} if rng is None else {'rng': rng}
+
     # Get result and new teams dictionary back from game
-    result, teams = game['function_name'](team1,
-                                          team2,
-                                          teams,
-                                          game['settings'])
+    if league is None:
+        result, teams = game['function_name'](team1,
+                                              team2,
+                                              teams,
+                                              game['settings'],
+                                              **options)
+    else:
+        result, league = game['function_name'](team1,
+                                               team2,
+                                               league,
+                                               game['settings'],
+                                               **options)
+
+    result = match_result(result, ids, game['stats'])
 
     if ladder is not None:
         ladder.record_result(result)
@@ -117,6 +282,97 @@ def play(team1, team2, game, ladder=None):
     return result
 
 
+def play_batch(matches, game, ladder=None, league=None, rng=None, ids=None):
+    '''Play a list of matches in a single call to the game's batch function
+    and return their results, in the same form as play(). Each team may
+    appear in at most one match, as in a round of a fixture. rng is a NumPy
+    generator, created fresh if none is supplied.'''
+    import numpy as np
+
+    if league is None:
+        league = teams
+
+    if ids is None:
+        if ladder is None:
+            raise ValueError('A ladder or team ids must be supplied!')
+        ids = ladder.ids
+
+    # Give the teams playing in this batch ids 0 to 2n - 1, home teams first.
+    names = [match[0] for match in matches] + [match[1] for match in matches]
+    home = np.arange(len(matches))
+    away = home + len(matches)
+    strength = np.array([league[name]['Strength'] for name in names])
+
+    if rng is None:
+        rng = np.random.default_rng()
+
+    batch, strength = game['batch_function'](home, away, strength,
+                                             game['settings'], rng)
+    results, winners, losers, stats = batch
+
+    for name, value in zip(names, strength.tolist()):
+        league[name]['Strength'] = value
+
+    # Convert batch ids to team ids.
+    team_ids = np.array([ids[name] for name in names], dtype=np.int64)
+    winners = team_ids[winners]
+    losers = team_ids[losers]
+
+    stat_names = game['stats']
+    if stat_names:
+        stat_rows = zip(*(stats[stat].tolist() for stat in stat_names))
+    else:
+        stat_rows = repeat(())
+
+    match_results = [MatchResult(result, winner, loser, row)
+                     for result, winner, loser, row
+                     in zip(results.tolist(), winners.tolist(),
+                            losers.tolist(), stat_rows)]
+
+    if ladder is not None:
+        if hasattr(ladder, 'record_results'):
+            ladder.record_results((results, winners, losers))
+        else:
+            for result in match_results:
+                ladder.record_result(result)
+
+    return match_results
+
+
+def play_round(matches, game, ladder=None, league=None, seed=None,
+               round_no=None, ids=None, batch=False):
+    '''Play a round of matches, using the game's batch function if it has
+    one and batch is True, and playing match by match otherwise. Matches
+    against the BYE team are skipped. Return the results.'''
+    matches = [match for match in matches if BYE not in match]
+
+    if batch and 'batch_function' in game and batch_available:
+        return play_batch(matches, game, ladder, league,
+                          rng=batch_rng(seed, round_no), ids=ids)
+
+    return [play(match[0], match[1], game, ladder, league,
+                 rng=seeded_rng(seed, round_no, match_number), ids=ids)
+            for match_number, match in enumerate(matches)]
+
+
+def batch_rng(seed, round_no):
+    '''Return a NumPy generator for a batch of matches, derived from the
+    simulation seed and the round, or a fresh one if no seed is in use.'''
+    import numpy as np
+
+    if seed is None:
+        return np.random.default_rng()
+    return np.random.default_rng(match_rng(seed, round_no, 'batch').getrandbits(128))
+
+
+def seeded_rng(seed, round_no, match_no):
+    '''Return match_rng for the match, or None if no seed is in use, in which
+    case games use the global random module.'''
+    if seed is None:
+        return None
+    return match_rng(seed, round_no, match_no)
+
+
 def rotate_except_first(team_list):
     '''Rotate a list of teams excluding the first team.
     For example,
@@ -127,39 +383,247 @@ def rotate_except_first(team_list):
     return new
 
 
-def elimination(game, settings, ladder):
-    '''Play a simple elimination fixture for the given teams.'''
+def print_match(winner, loser):
+    print('\n' + winner + ' vs ' + loser)
+    print('Winner:', winner)
+
+
+def elimination(game, settings, ladder, league=None, results=None, seed=None,
+                verbose=True):
+    '''Play a simple elimination fixture for the given teams. If a
+    ResultWriter is given as results, each match is stored in it, and
+    printed unless verbose is False. If a seed is given, each match is
+    played with its own seeded generator.'''
 
     # Get the top n teams from the ladder to play in fixture
-    final_n = settings['top_teams']
+    final_n = count_setting(settings, 'top_teams', 1)
 
     finalists = [team['Name'] for team in ladder.top(final_n)]
 
+    if len(finalists) & (len(finalists) - 1):
+        raise ValueError('Elimination needs a power of two number of '
+                         'finalists, not ' + str(len(finalists)) + '!')
+
     number_of_rounds = int(math.log(len(finalists), 2))
 
     report = [['Round', 'Winner', 'Winning Score', 'Loser', 'Losing Score']]
 
     for round_no in range(number_of_rounds):
+        round_name = 'Finals ' + str(round_no + 1)
         matches = loop_matches(finalists)
 
         # Play all matches in round
-        results = [play(match[0], match[1], game) for match in matches]
+        round_results = [play(match[0], match[1], game, league=league,
+                              rng=seeded_rng(seed, round_name, match_no),
+                              ids=ladder.ids)
+                         for match_no, match in enumerate(matches)]
 
-        for result in results:
-            store(result, 'Finals ' + str(round_no + 1))
+        for result in round_results:
+            winner = ladder.names[result.winner]
+            loser = ladder.names[result.loser]
+            stats = result.stats_dict(game['stats'])
 
-            # Output match
-            print('\n' + result[1] + ' vs ' + result[2])
-            print('Winner:', result[1])
+            if results is not None:
+                results.store(result, round_name)
 
-            report.append([str(round_no + 1), result[1], result[3]['Winning Score'], result[2], result[3]['Losing Score']])
+                # Output match
+                if verbose:
+                    print_match(winner, loser)
+
+            report.append([str(round_no + 1), winner, stats['Winning Score'], loser, stats['Losing Score']])
 
             # Eliminate losing teams
-            finalists = [f for f in finalists if f != result[2]]
+            finalists = [f for f in finalists if f != loser]
 
     return finalists, report
 
 
+def bracket_order(size):
+    '''Return the seeds, counting from 1, in the order they are placed in a
+    bracket of the given size (a power of two), so that the top seeds can
+    only meet in the later rounds.
+    For example, for 8 teams,
+    1 8 4 5 2 7 3 6'''
+    order = [1]
+
+    while len(order) < size:
+        order = [seed for first in order
+                 for seed in (first, 2 * len(order) + 1 - first)]
+
+    return order
+
+
+class Bracket:
+    '''A single-elimination bracket for any number of entrants, given in
+    seeded order. The bracket is padded to the next power of two with byes,
+    which are given to the top seeds, and the slots are laid out once so
+    that the winner of the match between slots 2i and 2i + 1 moves straight
+    to slot i of the next round.
+
+    Any aligned block of slots whose size is a power of two is a section of
+    the bracket which can be played independently of the rest until its
+    own winner is decided.'''
+
+    def __init__(self, entrants):
+        self.entrants = list(entrants)
+
+        self.size = 1 << max(len(self.entrants) - 1, 0).bit_length()
+        self.rounds = self.size.bit_length() - 1
+
+        # Byes are empty slots, holding None.
+        self.slots = [self.entrants[seed - 1]
+                      if seed <= len(self.entrants) else None
+                      for seed in bracket_order(self.size)]
+
+    def sections(self, count):
+        '''Split the slots into count sections, where count is a power of
+        two no larger than the bracket.'''
+        section_size = self.size // count
+        return [self.slots[start:start + section_size]
+                for start in range(0, self.size, section_size)]
+
+
+def play_bracket(slots, game, ids, league=None, seed=None, first_round=0,
+                 rounds=None, section=0):
+    '''Play rounds of a knockout bracket from the given slots, which are the
+    section numbered section of the whole bracket. Return the slots left
+    after the last round played and a list of each round's results.
+
+    In a draw, the game's winner still advances. Each match is played with
+    a generator derived from the seed, its round and its position in the
+    whole bracket's round, so sections may be played in any order or in
+    separate processes with the same result.'''
+    if rounds is None:
+        rounds = max(len(slots) - 1, 0).bit_length()
+
+    round_results = []
+
+    for round_no in range(first_round, first_round + rounds):
+        round_name = 'Finals ' + str(round_no + 1)
+        matches = len(slots) // 2
+        offset = section * matches
+
+        winners = [None] * matches
+        results = []
+
+        for match_no in range(matches):
+            first = slots[2 * match_no]
+            second = slots[2 * match_no + 1]
+
+            # A team without an opponent has a bye into the next round.
+            if first is None or second is None:
+                winners[match_no] = second if first is None else first
+                continue
+
+            result = play(first, second, game, league=league,
+                          rng=seeded_rng(seed, round_name, offset + match_no),
+                          ids=ids)
+
+            winners[match_no] = first if result.winner == ids[first] else second
+            results.append(result)
+
+        slots = winners
+        round_results.append(results)
+
+    return slots, round_results
+
+
+def unwrapped_game(game):
+    '''Return a copy of a game without any instrumentation of its
+    functions, which cannot be sent to worker processes.'''
+    game = dict(game)
+
+    for function in ('function_name', 'batch_function'):
+        if function in game:
+            game[function] = getattr(game[function], '__wrapped__',
+                                     game[function])
+
+    return game
+
+
+def play_section(slots, game, ids, league, seed, section):
+    '''Play a section of a knockout bracket in a worker process, on a copy
+    of its teams. Return the section's winner, its results and the teams.'''
+    slots, round_results = play_bracket(slots, game, ids, league, seed,
+                                        section=section)
+    return slots, round_results, league
+
+
+def knockout(game, settings, ladder, league=None, results=None, seed=None,
+             verbose=True):
+    '''Play a single-elimination knockout between the top teams on the
+    ladder, or every team if top_teams is 0, seeded by ladder position. Any
+    number of teams may enter, with the top seeds given byes in the first
+    round. As in elimination, if a ResultWriter is given as results, each
+    match is stored in it, and printed unless verbose is False.
+
+    If workers is more than 1, the bracket is split into sections which are
+    played in separate processes until one team is left in each, and the
+    remaining rounds are then played here. The results are the same as
+    playing the whole bracket in one process.'''
+    top_teams = count_setting(settings, 'top_teams')
+    entrants = ladder.top(top_teams) if top_teams else ladder.ordered()
+
+    bracket = Bracket(team['Name'] for team in entrants)
+
+    if league is None:
+        league = teams
+
+    workers = count_setting(settings, 'workers', 1)
+    sections = min(1 << max(workers - 1, 0).bit_length(), bracket.size // 2)
+
+    if sections > 1:
+        # Only imported when needed, as it slows down starting the program.
+        from concurrent.futures import ProcessPoolExecutor
+
+        section_slots = bracket.sections(sections)
+        worker_game = unwrapped_game(game)
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(
+                play_section, slots, worker_game, ladder.ids,
+                {name: league[name] for name in slots if name is not None},
+                seed, section) for section, slots in enumerate(section_slots)]
+            played = [future.result() for future in futures]
+
+        slots = []
+        round_results = [[] for _ in range(bracket.rounds)]
+
+        # Keep each round's results in bracket order, as if played here.
+        for winners, section_results, section_league in played:
+            slots.extend(winners)
+            league.update(section_league)
+            for round_no, results_in_round in enumerate(section_results):
+                round_results[round_no].extend(results_in_round)
+
+        first_round = len(played[0][1])
+        slots, final_results = play_bracket(slots, game, ladder.ids, league,
+                                            seed, first_round=first_round)
+        round_results[first_round:] = final_results
+    else:
+        slots, round_results = play_bracket(bracket.slots, game, ladder.ids,
+                                            league, seed)
+
+    report = [['Round', 'Winner', 'Winning Score', 'Loser', 'Losing Score']]
+
+    for round_no, results_in_round in enumerate(round_results):
+        for result in results_in_round:
+            winner = ladder.names[result.winner]
+            loser = ladder.names[result.loser]
+
+            if results is not None:
+                results.store(result, 'Finals ' + str(round_no + 1))
+
+                if verbose:
+                    print_match(winner, loser)
+
+            stats = result.stats_dict(game['stats'])
+            report.append([str(round_no + 1), winner, stats['Winning Score'],
+                           loser, stats['Losing Score']])
+
+    return [slot for slot in slots if slot is not None], report
+
+
 def loop_matches(teams):
     '''Split the list of teams into two halves and them zip them in matches.
     For example, 1 2 3 4 5 6, or:
@@ -170,30 +634,270 @@ def loop_matches(teams):
     return list(zip(teams[:len(teams)//2], reversed(teams[len(teams)//2:])))
 
 
-def round_robin(teams, settings):
-    '''Generate a round-robin fixture using the algorithm from
-    https://en.wikipedia.org/wiki/Round-robin_tournament. Teams
-    will play each other n times.
+class RoundRobinFixture:
+    '''A round-robin fixture, using the circle method from
+    https://en.wikipedia.org/wiki/Round-robin_tournament, in which each
+    round is computed when it is needed.
 
-    Add a dummy team to support byes in competitions with an uneven number
-    of teams.'''
+    The first team stays in place while the others rotate one position per
+    round, so after k rotations the team in position p (other than the
+    first) is the one which started in position 1 + (p - 1 - k) mod (n - 1).
+    This means any round can be produced directly, without building the
+    rounds before it.'''
+
+    def __init__(self, team_names, revolutions):
+        # Get list of team names, adding BYE team if necessary
+        self.team_names = list(team_names)
+
+        if len(self.team_names) % 2 != 0:
+            self.team_names.append(BYE)
+
+        self.revolutions = revolutions
+        self.rounds_per_revolution = max(len(self.team_names) - 1, 0)
+
+    def __len__(self):
+        return self.rounds_per_revolution * self.revolutions
+
+    def __getitem__(self, round_index):
+        '''Return the matches of a round, counting from zero.'''
+        if round_index < 0:
+            round_index += len(self)
+        if not 0 <= round_index < len(self):
+            raise IndexError('Round ' + str(round_index) + ' not in fixture!')
+
+        rotations = round_index % self.rounds_per_revolution
+        size = len(self.team_names)
 
-    # Get list of team names, adding BYE team if necessary
-    team_names = list(teams.keys())
+        def team_at(position):
+            if position == 0:
+                return self.team_names[0]
+            return self.team_names[1 + (position - 1 - rotations) % (size - 1)]
 
-    if len(team_names) % 2 != 0:
-        team_names.append('BYE')
+        # Pair positions from each end, as loop_matches does.
+        return [(team_at(position), team_at(size - 1 - position))
+                for position in range(size // 2)]
 
-    number_of_rounds = len(team_names) - 1
-    rounds = []
+    def __iter__(self):
+        return self.rounds()
 
-    for _ in range(settings['revolutions']):
-        for _ in range(number_of_rounds):
-            matches = loop_matches(team_names)
-            rounds.append(matches)
-            team_names = rotate_except_first(team_names)
+    def rounds(self, start=0, stop=None):
+        '''Yield the rounds from start up to, but not including, stop.'''
+        if stop is None:
+            stop = len(self)
 
-    return rounds
+        for round_index in range(start, stop):
+            yield self[round_index]
+
+
+def fixture_rounds(fixture, start=0):
+    '''Return an iterator over the rounds of a fixture, skipping the first
+    start rounds. Fixtures restored from a checkpoint already continue from
+    the round they reached.'''
+    if start == 0 or hasattr(fixture, 'restore'):
+        return iter(fixture)
+    if hasattr(fixture, '__getitem__'):
+        return (fixture[round_index]
+                for round_index in range(start, len(fixture)))
+    return islice(fixture, start, None)
+
+
+def round_robin(teams, settings):
+    '''Generate a round-robin fixture using the algorithm from
+    https://en.wikipedia.org/wiki/Round-robin_tournament. Teams
+    will play each other n times.
+
+    Add a dummy team to support byes in competitions with an uneven number
+    of teams. Rounds are generated lazily as the fixture is read.'''
+    return RoundRobinFixture(teams.keys(),
+                             count_setting(settings, 'revolutions'))
+
+
+class SwissFixture:
+    '''A Swiss-system fixture, in which each round pairs teams with similar
+    standings. Rounds depend on the results so far, so the fixture must be
+    attached to the season's ladder before it is read, and each round is
+    paired from the ladder when it is needed.
+
+    Teams are paired within score groups, the top half of each group
+    against the bottom half, skipping opponents they have already played.
+    A team left over from a group floats down to the next one, and any
+    rematch left in the last group is swapped with the nearest match that
+    gives both pairs new opponents. If the number of teams is odd, the
+    lowest-ranked team which has not yet had a bye sits the round out
+    against the BYE team, and is given a win on the ladder when the round
+    is paired, as is usual in Swiss tournaments. Pairing a round takes O(n)
+    time, unless rematches can only be avoided by searching further.'''
+
+    def __init__(self, team_names, rounds):
+        self.team_names = list(team_names)
+        self.rounds = rounds
+        self.ladder = None
+
+    def __len__(self):
+        return self.rounds
+
+    def attach(self, ladder):
+        '''Start the fixture again, pairing rounds from the given ladder.'''
+        self.ladder = ladder
+        self.paired = 0
+        self.played = set()
+        self.byes = set()
+
+    def checkpoint(self):
+        '''Return the state of the fixture, as taken by restore.'''
+        return {'paired': self.paired,
+                'played': set(self.played),
+                'byes': set(self.byes)}
+
+    def restore(self, state):
+        '''Continue the fixture from a checkpoint, pairing the rounds after
+        those already paired.'''
+        self.paired = state['paired']
+        self.played = set(state['played'])
+        self.byes = set(state['byes'])
+
+    def __iter__(self):
+        if self.ladder is None:
+            raise ValueError('Swiss fixture must be attached to a ladder!')
+
+        while self.paired < self.rounds:
+            yield self.pair_round()
+
+    def pair_round(self):
+        '''Return the matches of the next round from the current ladder.'''
+        standings = self.ladder.ordered()
+
+        matches = []
+
+        if len(standings) % 2 != 0:
+            bye = next((position for position
+                        in range(len(standings) - 1, -1, -1)
+                        if standings[position]['Name'] not in self.byes),
+                       len(standings) - 1)
+            team = standings.pop(bye)['Name']
+            self.byes.add(team)
+            self.ladder.record_win(team)
+            matches.append((team, BYE))
+
+        floaters = []
+        position = 0
+
+        while position < len(standings):
+            # Collect the next score group.
+            end = position
+            points = standings[position]['Points']
+            while end < len(standings) and standings[end]['Points'] == points:
+                end += 1
+
+            group = floaters + [entry['Name']
+                                for entry in standings[position:end]]
+            position = end
+
+            # Float the lowest team down if the group is uneven, unless
+            # it is the last group.
+            last = position == len(standings)
+            if len(group) % 2 != 0 and not last:
+                floaters = [group.pop()]
+            else:
+                floaters = []
+
+            group_matches, unpaired = self.pair_group(group, last)
+            matches.extend(group_matches)
+            floaters = unpaired + floaters
+
+        self.avoid_rematches(matches)
+
+        for team1, team2 in matches:
+            self.played.add(frozenset((team1, team2)))
+
+        self.paired += 1
+
+        return matches
+
+    def avoid_rematches(self, matches):
+        '''Swap the opponents of each rematch with those of the nearest
+        match in the round for which both new pairs have not yet played.'''
+        for index, match in enumerate(matches):
+            if frozenset(match) not in self.played:
+                continue
+
+            others = sorted(range(len(matches)),
+                            key=lambda other: abs(other - index))
+            for other in others[1:]:
+                if self.swap_opponents(matches, index, other):
+                    break
+
+    def swap_opponents(self, matches, index, other):
+        '''Swap the opponents of two matches if that gives both pairs new
+        opponents, returning whether they were swapped.'''
+        team1, team2 = matches[index]
+        team3, team4 = matches[other]
+
+        if BYE in (team3, team4):
+            return False
+
+        for first, second in (((team1, team3), (team2, team4)),
+                              ((team1, team4), (team2, team3))):
+            if (frozenset(first) not in self.played
+                    and frozenset(second) not in self.played):
+                matches[index], matches[other] = first, second
+                return True
+
+        return False
+
+    def pair_group(self, group, last=False):
+        '''Pair a score group with an even number of teams, top half against
+        bottom half, avoiding rematches where possible. Return the matches
+        and the teams which could not be paired without a rematch, which
+        float down to the next group. In the last group, rematches are
+        allowed instead.'''
+        half = len(group) // 2
+        top, bottom = group[:half], group[half:]
+        taken = [False] * len(bottom)
+        matches = []
+        unmatched = []
+
+        for index, team in enumerate(top):
+            # Prefer the opponent in the same position of the bottom half,
+            # then the next free one, wrapping around.
+            for candidate in chain(range(index, len(bottom)), range(index)):
+                if (not taken[candidate] and frozenset(
+                        (team, bottom[candidate])) not in self.played):
+                    taken[candidate] = True
+                    matches.append((team, bottom[candidate]))
+                    break
+            else:
+                unmatched.append(team)
+
+        # Pair any teams left in order.
+        unmatched.extend(team for team, used in zip(bottom, taken) if not used)
+        unpaired = []
+
+        while unmatched:
+            team = unmatched.pop(0)
+            opponent = next((candidate for candidate in unmatched
+                             if frozenset((team, candidate)) not in self.played),
+                            None)
+
+            if opponent is None:
+                if not last or not unmatched:
+                    unpaired.append(team)
+                    continue
+                opponent = unmatched[0]
+
+            unmatched.remove(opponent)
+            matches.append((team, opponent))
+
+        return matches, unpaired
+
+
+def swiss(teams, settings):
+    '''Generate a Swiss-system fixture of the given number of rounds, or,
+    if rounds is 0, enough rounds to separate the teams (the base 2
+    logarithm of their number, rounded up).'''
+    rounds = (count_setting(settings, 'rounds')
+              or max(len(teams) - 1, 0).bit_length())
+    return SwissFixture(teams.keys(), rounds)
 
 
 def convert_to_int(n):
@@ -215,6 +919,110 @@ def load_teams(filename):
     return teams
 
 
+def read_teams(filename, parameters, chunk_size=10000):
+    '''Stream teams from csv file filename, with a header row, into a
+    dictionary of team dictionaries keyed by name, as parse_teams returns.
+
+    Column types come from the sport's parameters: Name is a string and
+    every other parameter an int. Any other columns are kept as strings.
+    Rows are read in chunks of chunk_size and each int column of a chunk is
+    converted in one call. A ValueError giving the line number is raised
+    for a missing parameter column, a row of the wrong length, a repeated
+    name or a value which is not an int.'''
+
+    with open(filename, newline='') as f:
+        reader = csv.reader(f)
+        fields = read_team_header(reader, filename, parameters)
+
+        numeric = [index + 1 for index, field in enumerate(fields)
+                   if field in parameters]
+        width = len(fields) + 1
+
+        parsed = {}
+
+        while True:
+            rows = list(islice(reader, chunk_size))
+            if not rows:
+                break
+
+            try:
+                if any(len(row) != width for row in rows):
+                    # Skip blank lines, as csv gives them as empty rows.
+                    rows = [row for row in rows if row]
+                    if not rows:
+                        continue
+                    if any(len(row) != width for row in rows):
+                        raise ValueError
+
+                columns = list(zip(*rows))
+                for index in numeric:
+                    columns[index] = map(int, columns[index])
+
+                size = len(parsed)
+                parsed.update(zip(columns[0],
+                                  [dict(zip(fields, values))
+                                   for values in zip(*columns[1:])]))
+
+                if len(parsed) != size + len(rows):
+                    raise ValueError
+            except ValueError:
+                # Read the file again, row by row, to report the problem.
+                find_team_error(filename, parameters)
+                raise
+
+    return parsed
+
+
+def read_team_header(reader, filename, parameters):
+    '''Read and check the header row of a team file, returning the fields
+    after Name.'''
+    try:
+        header = next(reader)
+    except StopIteration:
+        raise ValueError(filename + ' is empty!')
+
+    if not header or header[0] != 'Name':
+        raise ValueError('Line 1: first column must be Name!')
+
+    for parameter in parameters:
+        if parameter not in header:
+            raise ValueError('Line 1: missing column ' + parameter + '!')
+
+    return header[1:]
+
+
+def find_team_error(filename, parameters):
+    '''Check a team file row by row, raising a ValueError with the line
+    number of the first problem found.'''
+    with open(filename, newline='') as f:
+        reader = csv.reader(f)
+        fields = read_team_header(reader, filename, parameters)
+        names = set()
+
+        for row in reader:
+            if not row:
+                continue
+
+            line = 'Line ' + str(reader.line_num) + ': '
+
+            if len(row) != len(fields) + 1:
+                raise ValueError(line + 'expected ' + str(len(fields) + 1)
+                                 + ' values but found ' + str(len(row)) + '!')
+
+            if row[0] in names:
+                raise ValueError(line + 'team ' + row[0]
+                                 + ' is listed more than once!')
+            names.add(row[0])
+
+            for field, value in zip(fields, row[1:]):
+                if field in parameters:
+                    try:
+                        int(value)
+                    except ValueError:
+                        raise ValueError(line + field + ' value ' + repr(value)
+                                         + ' is not an integer!')
+
+
 def save_teams(team_array, filename):
     '''Saves team_array to filename.'''
 
@@ -225,69 +1033,159 @@ def save_teams(team_array, filename):
             writer.writerow(row)
 
 
-def add_teams(table):
-    '''Recieves a table from the GUI and converts it into a list of team
-    dictionaries.'''
+def parse_teams(table):
+    '''Recieves a table from the GUI and converts it into a dictionary of
+    team dictionaries, keyed by name. The table is not modified.'''
 
-    # Isolate field list and remove name field
-    fields = table.pop(0)
-    fields.pop(0)
+    # Isolate field list, without the name field
+    fields = table[0][1:]
 
-    # Loop through teams, converting each to dictionary and adding them to
-    # global teams list
-    for row in table:
-        name = row.pop(0)
+    parsed = {}
 
+    # Loop through teams, converting each to dictionary
+    for row in table[1:]:
         team_attributes = {}
 
-        for field in zip(fields, row):
+        for field in zip(fields, row[1:]):
             team_attributes[field[0]] = convert_to_int(field[1])
 
-        teams[name] = team_attributes
+        parsed[row[0]] = team_attributes
 
+    return parsed
 
-def store(result, round_no):
-    '''Format result into list and store in output buffer.'''
-    row = {'Round': round_no}
 
-    if result[0] == DRAW:
-        row['Winner'] = result[1] + ', ' + result[2]
-        row['Loser'] = '-'
+def add_teams(table):
+    '''Recieves a table from the GUI and adds its teams to the global teams
+    dictionary.'''
+    teams.update(parse_teams(table))
+
+
+def format_result(result, round_no, names):
+    '''Format a MatchResult into a row for output, using names to look up
+    team names.'''
+    if result.result == DRAW:
+        row = [round_no, names[result.winner] + ', ' + names[result.loser], '-']
     else:
-        row['Winner'] = result[1]
-        row['Loser'] = result[2]
+        row = [round_no, names[result.winner], names[result.loser]]
 
     # Add all statistics.
-    for stat, value in result[3].items():
-        row[stat] = value
+    row.extend(result.stats)
 
-    output.append(row)
+    return row
 
 
-def output_data(filename):
-    '''Flush output buffer to filename.'''
-    with open(filename, 'w') as f:
-        # Add mandatory field names
-        fieldnames = ['Round', 'Winner', 'Loser']
+class ResultWriter:
+    '''Write results to a CSV file as they are produced. Results are held in
+    a buffer of at most buffer_size and formatted and written out in
+    batches, so memory use does not grow with the number of matches played.
+
+    The columns are Round, Winner and Loser followed by the given stats.
+    names is the list of team names, indexed by team id.'''
+
+    buffer_size = 1000
+
+    def __init__(self, filename, stats, names, append=False, checkpoint=None):
+        self.names = names
+        self.buffer = []
+        self.rows_written = 0
+
+        if checkpoint is not None:
+            # Continue the file from the checkpoint, dropping any rows written
+            # after it.
+            self.file = open(filename, 'a')
+            self.file.truncate(checkpoint['offset'])
+            self.writer = csv.writer(self.file)
+            self.rows_written = checkpoint['rows']
+            return
+
+        # Only write a header when starting a new file.
+        header = (not append or not os.path.exists(filename)
+                  or os.path.getsize(filename) == 0)
+
+        self.file = open(filename, 'a' if append else 'w')
+        self.writer = csv.writer(self.file)
+
+        if header:
+            # Add mandatory field names, then all statistics
+            self.writer.writerow(['Round', 'Winner', 'Loser'] + list(stats))
+
+    def store(self, result, round_no):
+        '''Add a MatchResult to the buffer.'''
+        self.buffer.append((result, round_no))
+
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        '''Format and write all buffered results to the file.'''
+        if self.buffer:
+            self.writer.writerows(format_result(result, round_no, self.names)
+                                  for result, round_no in self.buffer)
+            self.rows_written += len(self.buffer)
+            self.buffer = []
+
+        self.file.flush()
 
-        # Add all other field names
-        fieldnames.extend([field for field in output[0].keys()
-                           if field not in fieldnames])
+    def checkpoint(self):
+        '''Write all buffered results to disk and return the state needed
+        to continue the file from this point.'''
+        self.flush()
+        os.fsync(self.file.fileno())
+        return {'offset': self.file.tell(), 'rows': self.rows_written}
 
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+    def close(self):
+        self.flush()
+        self.file.close()
 
-        writer.writeheader()
-        writer.writerows(output)
+    def __enter__(self):
+        return self
 
+    def __exit__(self, *exc_info):
+        self.close()
 
-def play_fixture(fixture, ladder, game):
+
+def output_data(filename, stats, names, append=False, checkpoint=None):
+    '''Open filename for writing results with the given stats for teams with
+    the given names, returning a ResultWriter. If append is True, results
+    are added to the end of an existing file. If checkpoint is given, the
+    file is continued from the state returned by the writer's checkpoint
+    method, discarding anything written after it. Filenames
+    ending in binary_extension are written in the binary format of
+    columnar.BinaryResultWriter instead of as CSV.'''
+    if filename.endswith(binary_extension):
+        from columnar import BinaryResultWriter
+        return BinaryResultWriter(filename, stats, names, append, checkpoint)
+
+    return ResultWriter(filename, stats, names, append, checkpoint)
+
+
+def play_fixture(fixture, ladder, game, results):
     '''Take a given fixture of matches (a list of lists of matches).
     Play each round, getting the result using the specified game
-    and store the result.'''
+    and store the result in a ResultWriter.'''
     for round_number, round_matches in enumerate(fixture):
         for match in round_matches:
             result = play(match[0], match[1], game, ladder)
-            store(result, round_number + 1)
+            results.store(result, round_number + 1)
+
+
+def parse_fields(settings, setting='tie_breakers'):
+    '''Split a comma-separated list of ladder fields from settings.'''
+    fields = str(settings.get(setting, '')).split(',')
+    return [field.strip() for field in fields if field.strip()]
+
+
+def count_setting(settings, setting, minimum=0):
+    '''Return a setting which must be a whole number of at least minimum,
+    raising a ValueError if it is not.'''
+    value = settings[setting]
+
+    if not isinstance(value, int) or value < minimum:
+        raise ValueError('Setting ' + setting + ' must be a whole number of '
+                         'at least ' + str(minimum) + ', not '
+                         + repr(value) + '!')
+
+    return value
 
 
 def clean_dictionary(dic):
@@ -298,45 +1196,420 @@ def clean_dictionary(dic):
 
 # Define default characteristics of each tournament and finals structure.
 tournament_structures = {'Round Robin': {'function_name': round_robin,
-                                         'settings': {'revolutions': '1'}}}
+                                         'settings': {'revolutions': '1',
+                                                      'tie_breakers': ''}},
+                         'Swiss': {'function_name': swiss,
+                                   'settings': {'rounds': '0',
+                                                'tie_breakers': ''}}}
 
 finals_structures = {'Elimination': {'function_name': elimination,
-                                     'settings': {'top_teams': '4'}}}
+                                     'settings': {'top_teams': '4'}},
+                     'Knockout': {'function_name': knockout,
+                                  'settings': {'top_teams': '0',
+                                               'workers': '1'}}}
+
+
+class Simulation:
+    '''A single simulation of a season and finals series. It owns its teams,
+    game and structure settings, random seed, ladder and result writer, so
+    any number of simulations can run at once in one process without
+    sharing state.'''
+
+    def __init__(self, teams, game=sports.games['Cricket'],
+                 structure=tournament_structures['Round Robin'],
+                 finals=finals_structures['Elimination'], seed=None,
+                 output='out.csv', ladder_class=Ladder, batch=False,
+                 instrument=False, checkpoint=None, checkpoint_rounds=10,
+                 resume=False, verbose=True):
+        # Take private copies of everything the simulation changes.
+        self.teams = {name: dict(attributes)
+                      for name, attributes in teams.items()}
+        self.game = copy_game(game)
+        self.structure = copy_definition(structure)
+        self.finals = copy_definition(finals)
+
+        # Without a seed, choose one so that the simulation still has its own
+        # random number stream.
+        self.seed = random.getrandbits(64) if seed is None else seed
+
+        self.output = output
+        self.ladder_class = ladder_class
+        self.batch = batch
+        self.verbose = verbose
+        self.ladder = None
+        self.results = None
+        self.partial = None
+
+        self.checkpoint = checkpoint
+        self.checkpoint_rounds = checkpoint_rounds
+        self.resume = resume
+
+        if resume and checkpoint is None:
+            raise ValueError('A checkpoint is needed to resume from!')
+
+        if checkpoint_rounds < 1:
+            raise ValueError('Checkpoints must be at least 1 round apart!')
+
+        self.instrumentation = Instrumentation() if instrument else None
+
+        if self.instrumentation is not None:
+            # Time the sport through the simulation's own copy of the game.
+            for function in ('function_name', 'batch_function'):
+                if function in self.game:
+                    self.game[function] = self.instrumentation.timed(
+                        'sport ' + self.game[function].__name__,
+                        self.game[function])
+
+    def phase(self, name):
+        '''Return a context manager timing a phase, if instrumented. If
+        instrument is True, the time spent in each phase and sport function,
+        the matches played and the rows and bytes written are recorded in
+        self.instrumentation, an Instrumentation. Otherwise it is None and
+        nothing is timed.'''
+        if self.instrumentation is None:
+            return nullcontext()
+        return self.instrumentation.phase(name)
+
+    def open_results(self, append=False, checkpoint=None):
+        '''Open the result writer, unless it is already open. Results are
+        written to a temporary file next to output, which replaces output when
+        the simulation is closed, so simulations writing to the same file
+        never interleave their rows. If append is True, results are added
+        directly to the end of the output file. If checkpoint is the state of
+        the writer from a checkpoint, the temporary file is continued from
+        it.'''
+        if self.results is not None:
+            return
+
+        if append:
+            filename = self.output
+        elif checkpoint is not None:
+            filename = self.partial
+        else:
+            filename = self.partial = '{}.{}-{}.part{}'.format(
+                self.output, os.getpid(), id(self),
+                os.path.splitext(self.output)[1])
+
+        if self.instrumentation is not None:
+            if checkpoint is not None:
+                self.results_size = checkpoint['offset']
+            else:
+                self.results_size = (os.path.getsize(filename)
+                                     if os.path.exists(filename) else 0)
+
+        with self.phase('output'):
+            self.results = output_data(filename, self.game['stats'],
+                                       self.ladder.names, append, checkpoint)
+
+        if self.instrumentation is not None:
+            self.results_filename = filename
+            self.results_rows = self.results.rows_written
+
+            for method in ('store', 'flush', 'close'):
+                setattr(self.results, method, self.instrumentation.timed(
+                    'store' if method == 'store' else 'output',
+                    getattr(self.results, method)))
+
+    def close(self):
+        '''Finish writing results, moving them into the output file.'''
+        if self.results is None:
+            return
+
+        self.results.close()
+
+        if self.instrumentation is not None:
+            self.instrumentation.rows_written += (self.results.rows_written
+                                                  - self.results_rows)
+            self.instrumentation.bytes_written += (
+                os.path.getsize(self.results_filename) - self.results_size)
+
+        self.results = None
+
+        if self.partial is not None:
+            os.replace(self.partial, self.output)
+            self.partial = None
+
+        self.remove_checkpoint()
+
+    def discard(self):
+        '''Stop writing results, leaving the output file unchanged. Used when
+        a simulation is cancelled.'''
+        if self.results is None:
+            return
+
+        self.results.close()
+        self.results = None
+
+        if self.partial is not None:
+            os.remove(self.partial)
+            self.partial = None
+
+        self.remove_checkpoint()
+
+    def save_checkpoint(self, fixture, round_no):
+        '''Save the state of the season after round_no rounds: the ladder's
+        tallies, the teams, the seed, the fixture's state and the position
+        reached in the results. Every match's generator is derived from the
+        seed and its round, so no other random state is needed. The
+        checkpoint is written to a temporary file and then moved into place,
+        so a crash never leaves a partly written checkpoint.
+
+        The season saves a checkpoint every checkpoint_rounds rounds and after
+        its last round, and the checkpoint is removed when the simulation is
+        closed.'''
+        with self.phase('checkpoint'):
+            state = {'version': checkpoint_version,
+                     'round': round_no,
+                     'seed': self.seed,
+                     'names': self.ladder.names,
+                     'tallies': self.ladder.tallies(),
+                     'teams': self.teams,
+                     'fixture': (fixture.checkpoint()
+                                 if hasattr(fixture, 'checkpoint') else None),
+                     'partial': self.partial,
+                     'results': self.results.checkpoint()}
+
+            temporary = self.checkpoint + '.tmp'
+            with open(temporary, 'wb') as f:
+                pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+
+            os.replace(temporary, self.checkpoint)
+
+    def load_checkpoint(self, fixture):
+        '''Restore the season from the checkpoint, after the fixture and
+        ladder have been created, and reopen its results. Return the number
+        of rounds already played. The resumed season gives the same ladder and
+        output as a run which was never interrupted. Checkpoints are pickles,
+        so only checkpoints written by a trusted simulation should be
+        resumed.'''
+        try:
+            with open(self.checkpoint, 'rb') as f:
+                state = pickle.load(f)
+        except FileNotFoundError:
+            raise ValueError('Checkpoint ' + self.checkpoint + ' not found!')
+
+        if state.get('version') != checkpoint_version:
+            raise ValueError('Checkpoint ' + self.checkpoint
+                             + ' is from another version!')
+
+        if state['names'] != self.ladder.names:
+            raise ValueError('Checkpoint ' + self.checkpoint
+                             + ' is of a different league!')
+
+        if state['partial'] is None or not os.path.exists(state['partial']):
+            raise ValueError('Results of checkpoint ' + self.checkpoint
+                             + ' not found!')
+
+        self.seed = state['seed']
+
+        # Update the teams in place, as they may be shared with the caller.
+        self.teams.clear()
+        self.teams.update(state['teams'])
+
+        self.ladder.record_tallies(state['tallies'])
+
+        if state['fixture'] is not None:
+            fixture.restore(state['fixture'])
+
+        self.partial = state['partial']
+        self.open_results(checkpoint=state['results'])
+
+        return state['round']
+
+    def remove_checkpoint(self):
+        if self.checkpoint is not None and os.path.exists(self.checkpoint):
+            os.remove(self.checkpoint)
+
+    def play_round(self, matches, round_no):
+        '''Play a round of matches on this simulation's teams and ladder.'''
+        return play_round(matches, self.game, self.ladder, self.teams,
+                          seed=self.seed, round_no=round_no, batch=self.batch)
+
+    def simulate_season(self):
+        '''Play the main season, yielding each round number as it is
+        completed and finally the ladder. Every match is played with a
+        generator derived from the seed, its round and its position in the
+        round, so runs with the same seed are identical.
+
+        If batch is True and the game has a batch function, each round is
+        played in one call to it with NumPy, with a generator derived from
+        the seed and the round. Batch rounds draw from a different random
+        stream, so they give different results from the same seed.
+
+        If resuming, the rounds saved in the checkpoint are not played again
+        or yielded.'''
+        with self.phase('fixture'):
+            fixture = self.structure['function_name'](
+                self.teams, self.structure['settings'])
+
+            self.ladder = self.ladder_class(
+                len(fixture), self.teams,
+                tie_breakers=parse_fields(self.structure['settings']))
+
+            # Fixtures which depend on results read them from the ladder.
+            if hasattr(fixture, 'attach'):
+                fixture.attach(self.ladder)
+
+        start = 0
+        if self.resume:
+            start = self.load_checkpoint(fixture)
+
+        if self.instrumentation is not None:
+            for method in ('record_result', 'record_results'):
+                if hasattr(self.ladder, method):
+                    setattr(self.ladder, method, self.instrumentation.timed(
+                        'ladder', getattr(self.ladder, method)))
+
+        self.open_results()
 
+        for round_no, round_results in self.season_rounds(fixture, start):
+            for result in round_results:
+                self.results.store(result, round_no)
 
-def simulate_season(teams=teams, game=sports.games['Cricket'],
-                    structure=tournament_structures['Round Robin']):
+            if self.instrumentation is not None:
+                self.instrumentation.matches += len(round_results)
 
-    # Sanitise settings by converting all fields possible to int.
-    game['settings'] = clean_dictionary(game['settings'])
-    structure['settings'] = clean_dictionary(structure['settings'])
+            if self.checkpoint is not None and (
+                    round_no % self.checkpoint_rounds == 0
+                    or round_no == len(fixture)):
+                self.save_checkpoint(fixture, round_no)
 
-    fixture = structure['function_name'](teams, structure['settings'])
+            yield round_no - 1
 
-    ladder = Ladder(len(fixture), teams)
+        yield self.ladder
 
-    for round_number, round_matches in enumerate(fixture):
-        for match in round_matches:
-            result = play(match[0], match[1], game, ladder)
-            store(result, round_number + 1)
-        yield round_number
+    def season_rounds(self, fixture, start=0):
+        '''Play each round of the fixture after the first start rounds,
+        recording the results in the ladder. Yield the round number, counting
+        from 1, and the round's results in the order they are stored.'''
+        for round_number, round_matches in enumerate(
+                fixture_rounds(fixture, start), start):
+            with self.phase('season'):
+                round_results = self.play_round(round_matches,
+                                                round_number + 1)
 
-    output_data('out.csv')
+            yield round_number + 1, round_results
 
-    yield ladder
+    def simulate_finals(self):
+        '''Play the finals series from the season's ladder, then close the
+        simulation. Return the finals report. Matches are printed as they are
+        played unless verbose is False.'''
+        self.open_results(append=True)
 
-    return
+        with self.phase('finals'):
+            finalists, report = self.finals['function_name'](
+                self.game, self.finals['settings'], self.ladder,
+                league=self.teams, results=self.results, seed=self.seed,
+                verbose=self.verbose)
 
+        if self.instrumentation is not None:
+            self.instrumentation.matches += len(report) - 1
 
-def simulate_finals(ladder, teams=teams, game=sports.games['Cricket'],
-                    structure=finals_structures['Elimination']):
+        self.close()
+
+        return report
+
+
+class WithoutRng:
+    '''A game function written to the original contract, fn(team1, team2,
+    teams, settings), which can be called with an rng like any other. The
+    rng is dropped, so the game draws from the global random module and
+    runs of it are not reproducible from the seed.'''
+
+    def __init__(self, function):
+        self.function = function
+        self.__name__ = function.__name__
+
+    def __call__(self, team1, team2, teams, settings, rng=None):
+        return self.function(team1, team2, teams, settings)
+
+
+def accepts_rng(function):
+    '''Return whether a game function takes the rng keyword argument.'''
+    import inspect
+
+    try:
+        parameters = inspect.signature(function).parameters.values()
+    except (TypeError, ValueError):
+        return True
+
+    return any(parameter.name == 'rng'
+               or parameter.kind == parameter.VAR_KEYWORD
+               for parameter in parameters)
+
+
+def check_game(game):
+    '''Raise a ValueError if a game definition does not list its statistics,
+    which name the columns of the results and must be known before any
+    match is played.'''
+    if 'stats' not in game:
+        raise ValueError('Sport must list the statistics it returns in '
+                         'stats!')
+
+
+def copy_game(game):
+    '''Check and copy a game definition as copy_definition does. A function
+    which does not take rng is wrapped in WithoutRng.'''
+    check_game(game)
 
-    # Sanitise settings by converting all fields possible to int.
-    game['settings'] = clean_dictionary(game['settings'])
-    structure['settings'] = clean_dictionary(structure['settings'])
+    copied = copy_definition(game)
+    if not accepts_rng(copied['function_name']):
+        copied['function_name'] = WithoutRng(copied['function_name'])
 
-    finalists, report = structure['function_name'](game, structure['settings'], ladder)
+    return copied
+
+
+def copy_definition(definition):
+    '''Copy a game or structure definition with its own sanitised settings,
+    converting all fields possible to int.'''
+    copied = dict(definition)
+    copied['settings'] = clean_dictionary(dict(definition['settings']))
+    return copied
+
+
+def simulate_season(teams=teams, game=sports.games['Cricket'],
+                    structure=tournament_structures['Round Robin'],
+                    ladder_class=Ladder, seed=None, output='out.csv',
+                    instrument=False, batch=False):
+    '''Play the main season of a Simulation on teams in place, yielding each
+    round number as it is completed and finally the ladder. Results are
+    written to the output file by the end of the season. Any class with the
+    Ladder interface, such as columnar.ColumnarLadder, may be used to keep
+    the ladder. If batch is True, the game's batch function is used where
+    it has one.
+
+    If instrument is True, the season's Instrumentation is yielded after
+    the ladder.'''
+    simulation = Simulation(teams, game, structure, seed=seed, output=output,
+                            ladder_class=ladder_class, instrument=instrument,
+                            batch=batch)
+
+    # Play on the given teams, as callers of this function expect.
+    simulation.teams = teams
+
+    for status in simulation.simulate_season():
+        if isinstance(status, int):
+            yield status
+
+    simulation.close()
+
+    yield simulation.ladder
+
+    if instrument:
+        yield simulation.instrumentation
+
+
+def simulate_finals(ladder, teams=teams, game=sports.games['Cricket'],
+                    structure=finals_structures['Elimination'], seed=None,
+                    output='out.csv'):
+    '''Play the finals series of a Simulation on teams in place, appending
+    its results to the output file. Return the finals report.'''
+    simulation = Simulation(teams, game, finals=structure, seed=seed,
+                            output=output)
 
-    output_data('out.csv')
+    simulation.teams = teams
+    simulation.ladder = ladder
 
-    return report
+    return simulation.simulate_finals()
@@ -1,10 +1,131 @@
+import threading
+import time
+
 import remi.gui as gui
 from remi import start, App
 
 import ladder
+import plugins
 import sports
 
 
+class PagedTable(gui.VBox):
+    '''A table showing one page of rows at a time, with buttons to move
+    between pages. The header is shown on every page. Only the rows of the
+    current page are built as widgets, so the table takes the same time to
+    show and the same space on the page however many rows it has.
+
+    Rows are read from a source, which returns the header and the rows
+    from start up to stop, such as a ladder's matrix method. When the page
+    is shown again, only the cells which have changed are updated, so remi
+    only sends those rows to the browser.'''
+
+    def __init__(self, width, row_height, page_size):
+        self.table_width = width
+        self.row_height = row_height
+        self.page_size = page_size
+
+        # Room for a full page, the header and the page buttons.
+        self.total_height = row_height * (page_size + 2)
+
+        super(PagedTable, self).__init__(width=width,
+                                         height=self.total_height,
+                                         margin='10px')
+
+        self.row_count = lambda: 0
+        self.rows = lambda start, stop: [[]]
+        self.page = 0
+
+        # The rows currently shown, and the TableItem of each of their cells.
+        self.shown = []
+        self.cells = []
+
+        self.append(gui.Table(width=width, height=row_height), key='table')
+
+        navigation = gui.HBox(width=width, height=row_height)
+
+        previous_button = gui.Button('Previous')
+        previous_button.set_on_click_listener(self, 'previous_page')
+        navigation.append(previous_button)
+
+        self.page_label = gui.Label('')
+        navigation.append(self.page_label)
+
+        next_button = gui.Button('Next')
+        next_button.set_on_click_listener(self, 'next_page')
+        navigation.append(next_button)
+
+        self.append(navigation, key='navigation')
+
+    def pages(self):
+        return max(1, -(-self.row_count() // self.page_size))
+
+    def set_source(self, row_count, rows, page=None):
+        '''Show rows from a new source, on the given page or the current
+        one. row_count returns the number of rows, without the header.'''
+        self.row_count = row_count
+        self.rows = rows
+        self.show_page(self.page if page is None else page)
+
+    def set_matrix(self, matrix, page=None):
+        '''Show the rows of a matrix, whose first row is the header. The
+        matrix may be changed later, after which the page should be shown
+        again.'''
+        self.set_source(lambda: len(matrix) - 1,
+                        lambda start, stop: matrix[:1] + matrix[1 + start:1 + stop],
+                        page)
+
+    def show_page(self, page):
+        self.page = min(max(page, 0), self.pages() - 1)
+
+        start = self.page * self.page_size
+        rows = self.rows(start, start + self.page_size)
+
+        if (len(rows) == len(self.shown)
+                and all(len(row) == len(shown)
+                        for row, shown in zip(rows, self.shown))):
+            # Same shape as the rows shown, so only update changed cells.
+            for row, shown, cells in zip(rows, self.shown, self.cells):
+                if row != shown:
+                    for value, old, cell in zip(row, shown, cells):
+                        if value != old:
+                            cell.set_text(str(value))
+        else:
+            self.build_table(rows)
+
+        self.shown = [list(row) for row in rows]
+
+        label = ('Page ' + str(self.page + 1) + ' of ' + str(self.pages())
+                 + ' (' + str(self.row_count()) + ' rows)')
+        if self.page_label.get_text() != label:
+            self.page_label.set_text(label)
+
+    def build_table(self, rows):
+        table = gui.Table(width=self.table_width,
+                          height=self.row_height * len(rows))
+        self.cells = []
+
+        for index, row in enumerate(rows):
+            table_row = gui.TableRow()
+            cell_class = gui.TableTitle if index == 0 else gui.TableItem
+            cells = [cell_class(str(value)) for value in row]
+            for cell in cells:
+                table_row.append(cell)
+            table.append(table_row, key=str(index))
+            self.cells.append(cells)
+
+        self.append(table, key='table')
+
+    def next_page(self):
+        self.show_page(self.page + 1)
+
+    def previous_page(self):
+        self.show_page(self.page - 1)
+
+    def last_page(self):
+        self.show_page(self.pages() - 1)
+
+
 class LadderApp(App):
 
     def __init__(self, *args):
@@ -18,6 +139,18 @@ class LadderApp(App):
         self.table_row_height = 20
         self.side_padding = 50
 
+        # Number of rows shown on each page of the team and ladder tables.
+        self.page_size = 20
+
+        # Minimum number of seconds between progress updates pushed to the
+        # page while a simulation runs.
+        self.refresh_interval = 0.5
+        self.simulation_thread = None
+        self.ladder_table = None
+
+        # Whether to time each phase of a simulation and show a summary.
+        self.instrument = False
+
         self.container = gui.VBox(width=self.base_width + 2*self.side_padding,
                                   height=self.base_height)
 
@@ -39,6 +172,11 @@ class LadderApp(App):
         settings.'''
         self.tournament_select()
 
+        # Create checkbox to show a timing summary after simulating
+        timing_checkbox = gui.CheckBoxLabel('Show timing summary', False)
+        timing_checkbox.set_on_change_listener(self, 'set_instrument')
+        self.container.append(timing_checkbox)
+
         # Create button to advance to stage 4
         simulate_button = gui.Button('Simulate')
         simulate_button.set_on_click_listener(self, 'stage_4')
@@ -46,9 +184,12 @@ class LadderApp(App):
 
         self.container.set_size(self.base_width + 2 * self.side_padding,
                                 self.teams_table_height
-                                + 7 * self.element_height
+                                + 8 * self.element_height
                                 + self.base_height)
 
+    def set_instrument(self, value):
+        self.instrument = bool(value)
+
     def stage_4(self):
         '''Called by the next button in stage 3, run simulation.'''
         self.simulate()
@@ -93,8 +234,13 @@ class LadderApp(App):
         self.container.append(sport_select_container)
 
     def set_sport(self, value):
-        '''On change in dropdown selection, set new selected sport.'''
-        self.sport = self.available_sports[value]
+        '''On change in dropdown selection, set new selected sport, importing
+        it if it comes from a plugin.'''
+        try:
+            self.sport = plugins.resolve(self.available_sports[value])
+        except Exception as error:
+            self.display_error('Could not load sport ' + value + ': '
+                               + str(error))
 
     def sport_settings_dialog(self):
         '''Build sport settings dialog.'''
@@ -192,11 +338,19 @@ class LadderApp(App):
 
     def set_tournament(self, value):
         '''On change in dropdown selection, set new selected tournament.'''
-        self.tournament = self.available_tournaments[value]
+        try:
+            self.tournament = plugins.resolve(self.available_tournaments[value])
+        except Exception as error:
+            self.display_error('Could not load tournament ' + value + ': '
+                               + str(error))
 
     def set_finals(self, value):
         '''On change in dropdown selection, set new selected finals.'''
-        self.finals = self.available_finals[value]
+        try:
+            self.finals = plugins.resolve(self.available_finals[value])
+        except Exception as error:
+            self.display_error('Could not load finals ' + value + ': '
+                               + str(error))
 
     def build_tournament_settings_dialog(self):
         '''Build tournament settings dialog.'''
@@ -265,41 +419,23 @@ class LadderApp(App):
         the team_parameters list.'''
 
         # Create and initialise table, where:
-        #   self.teams_table is the GUI element
+        #   self.teams_table is the GUI element, showing a page of teams
         #   self.teams is the data element for later processing
-        self.teams_table_height = self.table_row_height
-        self.teams_table_entries = 0
-        self.teams_table = gui.Table(width=self.base_width,
-                                     height=self.teams_table_height,
-                                     margin='10px')
+        self.teams_table = PagedTable(self.base_width, self.table_row_height,
+                                      self.page_size)
+        self.teams_table_height = self.teams_table.total_height
 
         # The populate variable may be a table array, in which case the table
         # is pre-populated
         if populate is not False:
             # Set internal teams structure to the whole populate array
             self.teams = populate
-
-            # Set GUI table to the first row of the populate array, namely the
-            # list of parameters.
-            self.teams_table.from_2d_matrix([populate[0]])
-
-            # Loop through remaining teams, building rows
-            for team in populate[1:]:
-                row = gui.TableRow()
-                for item in team:
-                    row.append(gui.TableItem(item))
-
-                # Add row to table, assigning it a new ID
-                self.teams_table_entries += 1
-                self.teams_table.append(row, key=str(self.teams_table_entries))
-
-            # Set table height correctly
-            self.teams_table_height = len(populate) * self.table_row_height
         else:
             # Othwerwise, just create a table with the supplied parameters.
-            self.teams_table.from_2d_matrix([team_parameters])
             self.teams = [team_parameters]
 
+        self.teams_table.set_matrix(self.teams, page=0)
+
         # Create editable row
         self.new_row = gui.TextInput(width=self.base_width,
                                      height=self.table_row_height)
@@ -342,7 +478,6 @@ class LadderApp(App):
                                 self.teams_table_height
                                 + 6 * self.element_height
                                 + self.base_height)
-        self.teams_table.set_size(self.base_width, self.teams_table_height)
 
     def load_table_file_select(self):
         '''Open a file selection dialog to choose a team csv file
@@ -383,73 +518,172 @@ class LadderApp(App):
         ladder.save_teams(self.teams, value)
 
     def simulate(self):
-        '''Use current settings to run a simulation.'''
+        '''Use current settings to start a simulation. The simulation runs in
+        a background thread, so the server stays responsive while it runs.'''
+
+        if (self.simulation_thread is not None
+                and self.simulation_thread.is_alive()):
+            self.display_error('A simulation is already running!')
+            return 1
+
+        # Create a simulation of the teams in the table, with its own copy of
+        # the current settings.
+        try:
+            simulation = ladder.Simulation(ladder.parse_teams(self.teams),
+                                           game=self.sport,
+                                           structure=self.tournament,
+                                           finals=self.finals,
+                                           instrument=self.instrument)
+        except ValueError as error:
+            self.display_error(str(error))
+            return 1
 
-        # Add teams to ladder module
-        ladder.add_teams(self.teams)
+        # Create button to cancel the simulation
+        self.cancel_requested = threading.Event()
+        cancel_button = gui.Button('Cancel')
+        cancel_button.set_on_click_listener(self, 'cancel_simulation')
+        self.container.append(cancel_button, key='cancel_button')
+
+        self.simulation_progress('Simulating...')
+
+        self.simulation_thread = threading.Thread(
+            target=self.run_simulation,
+            args=(simulation, self.cancel_requested))
+        self.simulation_thread.daemon = True
+        self.simulation_thread.start()
+
+    def run_simulation(self, simulation, cancel_requested):
+        '''Run a simulation in the background. If it fails, its results are
+        discarded and the error is shown.'''
+        try:
+            self.play_simulation(simulation, cancel_requested)
+        except Exception as error:
+            simulation.discard()
+            with self.update_lock:
+                self.simulation_progress('Simulation failed.')
+                self.display_error('Simulation failed: ' + str(error))
+                if 'cancel_button' in self.container.children:
+                    self.container.remove_child(
+                        self.container.get_child('cancel_button'))
+
+    def play_simulation(self, simulation, cancel_requested):
+        '''Play a simulation, showing its progress. The progress message and
+        the interim ladder are pushed to the page at most once every
+        refresh_interval seconds, updating only the ladder rows which have
+        changed. Widgets are only changed while holding the app's update
+        lock.'''
 
         # Create main season simulator, represented by a generator.
-        season_simulator = ladder.simulate_season(game=self.sport,
-                                                  structure=self.tournament)
+        season_simulator = simulation.simulate_season()
+        last_update = 0
 
         # Iterate through the season, stopping if the status returned is not an
         # integer, in which case the final ladder has been returned.
-        generator_status = 0
-        self.simulation_progress()
-
-        while type(generator_status) == int:
-            self.simulation_progress(generator_status)
-            generator_status = next(season_simulator)
+        for generator_status in self.locked(season_simulator):
+            if cancel_requested.is_set():
+                simulation.discard()
+                with self.update_lock:
+                    self.simulation_progress('Simulation cancelled.')
+                    self.container.remove_child(
+                        self.container.get_child('cancel_button'))
+                return
+
+            if type(generator_status) != int:
+                break
+
+            if time.time() - last_update >= self.refresh_interval:
+                last_update = time.time()
+                with self.update_lock:
+                    self.simulation_progress('Round ' + str(generator_status + 1))
+                    self.output_ladder(simulation.ladder)
 
         ladder_class = generator_status
 
         # Print the ladder after the main season
         ladder_class.print_ladder()
-        self.output_ladder(ladder_class)
 
         # Simulate finals
-        finals = ladder.simulate_finals(ladder=ladder_class, structure=self.finals)
-        self.output_finals(finals)
+        finals = simulation.simulate_finals()
+
+        with self.update_lock:
+            self.simulation_progress('Simulation complete.')
+            self.output_ladder(ladder_class)
+            self.output_finals(finals)
+            if simulation.instrumentation is not None:
+                self.output_timing(simulation.instrumentation.matrix())
+            self.container.remove_child(
+                self.container.get_child('cancel_button'))
+
+    def locked(self, generator):
+        '''Yield the items of a generator, advancing it only while holding
+        the update lock, so that event handlers such as the ladder's page
+        buttons never read the ladder part way through a round.'''
+        while True:
+            with self.update_lock:
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    return
+            yield item
+
+    def cancel_simulation(self):
+        '''Ask the running simulation to stop after its current round.'''
+        self.cancel_requested.set()
 
     def simulation_progress(self, message=''):
         '''Updates an output label with the contents of message.'''
         self.container.append(gui.Label(str(message)), key='progress_message')
 
     def output_ladder(self, ladder):
-        '''Adds a ladder object as a table to the GUI.'''
-
-        self.ladder_row_no = len(ladder.matrix()) + 1
+        '''Adds a ladder object as a paged table to the GUI, or updates the
+        table if it has already been added.'''
+        if self.ladder_table is None:
+            self.ladder_table = PagedTable(self.base_width,
+                                           self.table_row_height,
+                                           self.page_size)
+            self.container.append(self.ladder_table, key='ladder_table')
 
-        self.ladder_table = gui.Table(width=self.base_width,
-                                      height=self.table_row_height * self.ladder_row_no,
-                                      margin='10px')
+        # Only the rows of the page being viewed are read from the ladder.
+        self.ladder_table.set_source(lambda: len(ladder.names), ladder.matrix)
 
-        self.ladder_table.from_2d_matrix(ladder.matrix())
+        self.container.set_size(self.base_width + 2 * self.side_padding,
+                                self.teams_table_height
+                                + 10 * self.element_height
+                                + self.base_height
+                                + self.ladder_table.total_height)
 
-        self.container.append(self.ladder_table, key='ladder_table')
+    def output_finals(self, finals):
+        '''Adds a paged table displaying finals games.'''
+        self.finals_table = PagedTable(self.base_width, self.table_row_height,
+                                       self.page_size)
+        self.finals_table.set_matrix(finals, page=0)
+        self.container.append(self.finals_table, key='finals_table')
 
         self.container.set_size(self.base_width + 2 * self.side_padding,
                                 self.teams_table_height
-                                + 9 * self.element_height
+                                + 10 * self.element_height
                                 + self.base_height
-                                + self.table_row_height * self.ladder_row_no)
+                                + self.ladder_table.total_height
+                                + self.finals_table.total_height)
 
-    def output_finals(self, finals):
-        '''Adds a table displaying finals games.'''
-        self.finals_row_no = len(finals) + 1
+    def output_timing(self, timing):
+        '''Adds a table summarising the time spent in each phase of the
+        simulation.'''
+        timing_row_no = len(timing) + 1
 
-        self.finals_table = gui.Table(width=self.base_width,
-                                      height=self.table_row_height * self.finals_row_no,
+        self.timing_table = gui.Table(width=self.base_width,
+                                      height=self.table_row_height * timing_row_no,
                                       margin='10px')
-        self.finals_table.from_2d_matrix(finals)
-        self.container.append(self.finals_table, key='finals_table')
+        self.timing_table.from_2d_matrix(timing)
+        self.container.append(self.timing_table, key='timing_table')
 
         self.container.set_size(self.base_width + 2 * self.side_padding,
                                 self.teams_table_height
-                                + 9 * self.element_height
+                                + 10 * self.element_height
                                 + self.base_height
-                                + self.table_row_height * self.ladder_row_no
-                                + self.table_row_height * self.finals_row_no)
+                                + self.ladder_table.total_height
+                                + self.finals_table.total_height
+                                + self.table_row_height * timing_row_no)
 
     def add_table_row(self):
         '''Adds row (from the input text area) to the end of the editable team
@@ -462,41 +696,17 @@ class LadderApp(App):
             self.display_error('No new data inputted!')
             return 1
 
-        # Create TableRow by iterating through new parameters
-        row = gui.TableRow()
-        raw_row = []
-        for item in row_parameters:
-            row.append(gui.TableItem(item))
-            raw_row.append(item)
-
-        # Add row to table, assigning it a new ID, and adjust table height to
-        # fit new row
-        self.teams_table_entries += 1
-        self.teams_table.append(row, key=str(self.teams_table_entries))
-        self.teams.append(raw_row)
-
-        self.teams_table_height += self.table_row_height
-
-        # Set container and table height
-        self.container.set_size(self.base_width + 2 * self.side_padding,
-                                self.teams_table_height
-                                + 6 * self.element_height
-                                + self.base_height)
-        self.teams_table.set_size(self.base_width, self.teams_table_height)
+        # Add row to the teams, showing the last page where it appears
+        self.teams.append(list(row_parameters))
+        self.teams_table.last_page()
 
     def delete_table_row(self):
         '''Deletes last row in teams table.'''
 
-        # Ensure that there are rows to delete
-        if self.teams_table_entries > 0:
-
-            # Get the last row as an object and decrement the last ID
-            last_row = self.teams_table.get_child(str(self.teams_table_entries))
-            self.teams_table_entries -= 1
-
-            # Delete the last row
-            self.teams_table.remove_child(last_row)
+        # Ensure that there are rows to delete, leaving the header
+        if len(self.teams) > 1:
             self.teams.pop()
+            self.teams_table.show_page(self.teams_table.page)
         else:
             self.display_error('No rows to delete!')
 
@@ -508,4 +718,8 @@ class LadderApp(App):
     def display_error(self, message):
         self.error_message.set_text(message)
 
-start(LadderApp, address='0.0.0.0', debug=True, start_browser=False)
+if __name__ == '__main__':
+    # Start-up time matters less for the GUI, so always look for plugins in
+    # installed packages.
+    plugins.load(entry_points=True)
+    start(LadderApp, address='0.0.0.0', debug=True, start_browser=False)
@@ -0,0 +1,263 @@
+'''Discover sports and structures provided by plugins.
+
+A plugin is a Python module, or a package, which describes itself with a
+PLUGIN dictionary (or a list of them) written as a literal, for example:
+
+    PLUGIN = {'kind': 'sport',
+              'name': 'Rugby',
+              'parameters': ['Name', 'Strength'],
+              'stats': ['Winning Score', 'Losing Score'],
+              'settings': {'max_points': '60'},
+              'function_name': 'rugby'}
+
+kind is 'sport', 'tournament' or 'finals'. Every other key is copied into
+the definition, as in sports.games, ladder.tournament_structures and
+ladder.finals_structures, except that function_name, and for sports
+batch_function and probabilities, give the names of functions in the
+plugin.
+
+Plugins are found in the plugins directory next to this file and, if
+enabled, in the 'ladder.plugins' entry point group of installed packages,
+whose entry points name a module's PLUGIN, such as 'rugby_model:PLUGIN'.
+Scanning installed packages takes tens of milliseconds, so the command line
+only does so when the LADDER_ENTRY_POINTS environment variable is set. The
+PLUGIN literal is read from the source without running it, and the module is
+only imported when one of its functions is first called, so plugins with
+heavy dependencies cost nothing until they are used.'''
+
+import ast
+import importlib
+import importlib.util
+import os
+import sys
+
+import ladder
+import sports
+
+plugin_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                'plugins')
+entry_point_group = 'ladder.plugins'
+
+# Set to any value to find plugins in entry points by default.
+entry_points_variable = 'LADDER_ENTRY_POINTS'
+
+# Sources of plugins already added, so that loading twice is harmless.
+loaded = set()
+
+# Keys which name functions in the plugin, for each kind of plugin.
+function_keys = {'sport': ('function_name', 'batch_function', 'probabilities'),
+                 'tournament': ('function_name',),
+                 'finals': ('function_name',)}
+
+
+class LazyFunction:
+    '''A function in a plugin module, which is imported on the first call.
+    The module is given by name, and by the path of its source if it is not
+    importable by name. Only these are pickled, so that the function can be
+    sent to worker processes.'''
+
+    def __init__(self, module, name, path=None):
+        self.module = module
+        self.path = path
+        self.__name__ = name
+        self.function = None
+
+    def load(self):
+        '''Import the plugin, if it has not been already, and return the
+        function.'''
+        if self.function is None:
+            if self.module in sys.modules:
+                module = sys.modules[self.module]
+            elif self.path is None:
+                module = importlib.import_module(self.module)
+            else:
+                module = import_path(self.module, self.path)
+
+            self.function = getattr(module, self.__name__)
+
+        return self.function
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    @property
+    def __signature__(self):
+        # Report the plugin function's arguments, such as whether it takes
+        # rng, rather than those of __call__.
+        import inspect
+        return inspect.signature(self.load())
+
+    def __getstate__(self):
+        return {'module': self.module, 'path': self.path,
+                '__name__': self.__name__, 'function': None}
+
+    def __repr__(self):
+        return '<LazyFunction {}.{}>'.format(self.module, self.__name__)
+
+
+def import_path(module_name, path):
+    '''Import a module or package from the path of its source.'''
+    locations = None
+    if os.path.basename(path) == '__init__.py':
+        locations = [os.path.dirname(path)]
+
+    spec = importlib.util.spec_from_file_location(
+        module_name, path, submodule_search_locations=locations)
+    module = importlib.util.module_from_spec(spec)
+
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[module_name]
+        raise
+
+    return module
+
+
+def read_plugin(path, variable='PLUGIN'):
+    '''Return the literal value assigned to variable in a Python source file
+    as a list of plugin dictionaries, without running the file.'''
+    with open(path, 'rb') as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    for node in tree.body:
+        if (isinstance(node, ast.Assign)
+                and any(isinstance(target, ast.Name) and target.id == variable
+                        for target in node.targets)):
+            try:
+                value = ast.literal_eval(node.value)
+            except ValueError:
+                raise ValueError('Plugin ' + path + ': ' + variable
+                                 + ' must be a literal!')
+            return value if isinstance(value, list) else [value]
+
+    raise ValueError('Plugin ' + path + ': no ' + variable + ' found!')
+
+
+def definition(plugin, module, path, source):
+    '''Build a sport or structure definition from a plugin dictionary,
+    returning its kind, name and definition.'''
+    kind = plugin.get('kind')
+    if kind not in function_keys:
+        raise ValueError('Plugin ' + source + ': kind must be one of '
+                         + ', '.join(function_keys) + '!')
+
+    for key in ('name', 'function_name', 'settings'):
+        if key not in plugin:
+            raise ValueError('Plugin ' + source + ': missing ' + key + '!')
+
+    if kind == 'sport':
+        for key in ('parameters', 'stats'):
+            if key not in plugin:
+                raise ValueError('Plugin ' + source + ': missing ' + key + '!')
+
+    built = {key: value for key, value in plugin.items()
+             if key not in ('kind', 'name')}
+
+    for key in function_keys[kind]:
+        if key in built:
+            built[key] = LazyFunction(module, built[key], path)
+
+    return kind, plugin['name'], built
+
+
+def directory_plugins(directory=plugin_directory):
+    '''Yield the (module name, source path) of each plugin in a directory:
+    any Python file, or package with an __init__.py, not starting with an
+    underscore.'''
+    if not os.path.isdir(directory):
+        return
+
+    for entry in sorted(os.listdir(directory)):
+        if entry.startswith(('_', '.')):
+            continue
+
+        path = os.path.join(directory, entry)
+        if entry.endswith('.py') and os.path.isfile(path):
+            yield 'ladder_plugin_' + entry[:-3], path
+        elif os.path.isfile(os.path.join(path, '__init__.py')):
+            yield 'ladder_plugin_' + entry, os.path.join(path, '__init__.py')
+
+
+def entry_point_plugins(group=entry_point_group):
+    '''Yield the (module name, source path, variable) of each plugin
+    registered as an entry point of installed packages. The module's source
+    is found without importing it, unless it is inside a package, whose
+    __init__ is then imported.'''
+    # importlib.metadata is slow to import, so it is only imported here.
+    from importlib.metadata import entry_points
+
+    for entry_point in entry_points(group=group):
+        module, _, variable = entry_point.value.partition(':')
+        spec = importlib.util.find_spec(module)
+
+        if spec is None or not spec.has_location:
+            raise ValueError('Plugin ' + entry_point.value
+                             + ': module source not found!')
+
+        yield module, spec.origin, variable.strip() or 'PLUGIN'
+
+
+def resolve(definition):
+    '''Import the plugin code of a sport or structure definition, if any,
+    so that errors in it are found when it is selected rather than part way
+    through a simulation.'''
+    for value in definition.values():
+        if isinstance(value, LazyFunction):
+            value.load()
+
+    return definition
+
+
+def registries():
+    return {'sport': sports.games,
+            'tournament': ladder.tournament_structures,
+            'finals': ladder.finals_structures}
+
+
+def load(directory=plugin_directory, group=entry_point_group,
+         entry_points=None):
+    '''Add the sports and structures of all plugins to sports.games,
+    ladder.tournament_structures and ladder.finals_structures, returning
+    the names added. No plugin code is run. Plugins which have already been
+    loaded are skipped, and a name which is already defined raises a
+    ValueError.
+
+    Entry points are only scanned if entry_points is True, or if it is None
+    and the LADDER_ENTRY_POINTS environment variable is set.'''
+    if entry_points is None:
+        entry_points = bool(os.environ.get(entry_points_variable))
+
+    found = [(module, path, None, path)
+             for module, path in directory_plugins(directory)]
+
+    if entry_points:
+        found.extend((module, None, variable, path)
+                     for module, path, variable in entry_point_plugins(group))
+
+    added = []
+
+    for module, import_from, variable, path in found:
+        if (path, variable) in loaded:
+            continue
+
+        # Build every definition in the plugin before registering any, so
+        # that a plugin with an error adds nothing and can be loaded again.
+        definitions = [definition(plugin, module, import_from, path)
+                       for plugin in read_plugin(path, variable or 'PLUGIN')]
+
+        names = set()
+        for kind, name, built in definitions:
+            if name in registries()[kind] or (kind, name) in names:
+                raise ValueError('Plugin ' + path + ': ' + kind + ' ' + name
+                                 + ' is already defined!')
+            names.add((kind, name))
+
+        for kind, name, built in definitions:
+            registries()[kind][name] = built
+            added.append(name)
+
+        loaded.add((path, variable))
+
+    return added
@@ -0,0 +1,217 @@
+'''Play the main season of a simulation across a pool of worker processes.
+
+Every match is played with a generator derived from the seed, its round and
+its position in the round, so a match gives the same result in any process.
+Each round's matches are split into one shard per worker, and the results
+and each shard's changes to its teams are merged back in order before the
+next round starts, since games such as cricket change their teams as they
+are played.
+
+Games marked as stateless in their definition never change their teams, so
+their rounds can be played ahead of time. For them, a round-robin fixture is
+split into blocks of rounds, which workers play from their own copy of the
+teams and fixture.
+
+Either way, the results, ladder and output file are the same as those of a
+Simulation played match by match (with batch=False) with the same seed.'''
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import ladder
+from ladder import BYE, DRAW, WIN, match_rng, play
+
+# State shared by all tasks in a worker process, set by init_worker.
+worker_state = {}
+
+
+def init_worker(game, ids, seed, league=None, fixture=None):
+    worker_state['game'] = game
+    worker_state['ids'] = ids
+    worker_state['seed'] = seed
+    worker_state['league'] = league
+    worker_state['fixture'] = fixture
+
+
+def tally(results, tallies=None):
+    '''Add up the wins, losses and draws of each team in a list of
+    MatchResults, in the form taken by Ladder.record_tallies.'''
+    if tallies is None:
+        tallies = {}
+
+    for result in results:
+        winner = tallies.setdefault(result.winner, [0, 0, 0])
+        loser = tallies.setdefault(result.loser, [0, 0, 0])
+
+        if result.result == WIN:
+            winner[0] += 1
+            loser[1] += 1
+        elif result.result == DRAW:
+            winner[2] += 1
+            loser[2] += 1
+        else:
+            raise ValueError('Result type not supported!')
+
+    return tallies
+
+
+def merge_tallies(tallies, other):
+    for team_id, counts in other.items():
+        total = tallies.setdefault(team_id, [0, 0, 0])
+        for index, count in enumerate(counts):
+            total[index] += count
+
+    return tallies
+
+
+def play_matches(matches, round_no, first_match, league):
+    '''Play matches of a round, the first being at position first_match in
+    the round, and return their results.'''
+    game = worker_state['game']
+    ids = worker_state['ids']
+    seed = worker_state['seed']
+
+    return [play(team1, team2, game, league=league,
+                 rng=match_rng(seed, round_no, first_match + match_no),
+                 ids=ids)
+            for match_no, (team1, team2) in enumerate(matches)]
+
+
+def play_shard(matches, round_no, first_match, league):
+    '''Play a shard of a round on the given teams. Return the results, their
+    tallies and the teams as changed by the games.'''
+    results = play_matches(matches, round_no, first_match, league)
+    return results, tally(results), league
+
+
+def play_block(start, stop):
+    '''Play the rounds of the worker's fixture from start up to, but not
+    including, stop, counting from zero, on the worker's teams. Return each
+    round's results and tallies.'''
+    fixture = worker_state['fixture']
+    league = worker_state['league']
+
+    round_results = []
+    round_tallies = []
+
+    for round_index in range(start, stop):
+        matches = [match for match in fixture[round_index] if BYE not in match]
+        results = play_matches(matches, round_index + 1, 0, league)
+        round_results.append(results)
+        round_tallies.append(tally(results))
+
+    return round_results, round_tallies
+
+
+def split(matches, shards):
+    '''Split a list of matches into at most shards contiguous parts, giving
+    the position of the first match of each.'''
+    size = -(-len(matches) // shards) if matches else 1
+    return [(start, matches[start:start + size])
+            for start in range(0, len(matches), size)]
+
+
+def record_tallies(season_ladder, tallies, results):
+    '''Record tallies in a ladder, or each result if it does not support
+    tallies.'''
+    if hasattr(season_ladder, 'record_tallies'):
+        season_ladder.record_tallies(tallies)
+    else:
+        for result in results:
+            season_ladder.record_result(result)
+
+
+class ShardedSimulation(ladder.Simulation):
+    '''A Simulation whose main season is played by a pool of worker
+    processes. The finals are played in this process.
+
+    Stateless games with an indexable fixture, such as a round robin, are
+    played in blocks of block_rounds rounds, with up to two blocks per
+    worker in progress at once. Otherwise each round is split between the
+    workers. Batch functions are not used, so that the results match a
+    Simulation played match by match.'''
+
+    def __init__(self, teams, *args, workers=None, block_rounds=16, **kwargs):
+        kwargs['batch'] = False
+        super().__init__(teams, *args, **kwargs)
+
+        self.workers = workers or os.cpu_count() or 1
+        self.block_rounds = block_rounds
+
+        self.worker_game = ladder.unwrapped_game(self.game)
+
+    def season_rounds(self, fixture, start=0):
+        stateless = (self.game.get('stateless', False)
+                     and hasattr(fixture, '__getitem__'))
+
+        with ProcessPoolExecutor(
+                max_workers=self.workers, initializer=init_worker,
+                initargs=(self.worker_game, self.ladder.ids, self.seed,
+                          self.teams if stateless else None,
+                          fixture if stateless else None)) as executor:
+            if stateless:
+                yield from self.play_blocks(executor, fixture, start)
+            else:
+                yield from self.play_shards(executor, fixture, start)
+
+    def play_shards(self, executor, fixture, start=0):
+        '''Play each round after the first start rounds, split into one
+        shard per worker.'''
+        for round_number, round_matches in enumerate(
+                ladder.fixture_rounds(fixture, start), start):
+            with self.phase('season'):
+                matches = [match for match in round_matches
+                           if BYE not in match]
+
+                futures = [executor.submit(
+                    play_shard, shard, round_number + 1, start,
+                    {name: self.teams[name] for match in shard
+                     for name in match})
+                    for start, shard in split(matches, self.workers)]
+
+                round_results = []
+                tallies = {}
+
+                for future in futures:
+                    results, shard_tallies, league = future.result()
+                    round_results.extend(results)
+                    merge_tallies(tallies, shard_tallies)
+                    self.teams.update(league)
+
+                record_tallies(self.ladder, tallies, round_results)
+
+            yield round_number + 1, round_results
+
+    def play_blocks(self, executor, fixture, start=0):
+        '''Play blocks of rounds after the first start rounds, keeping the
+        workers busy while earlier blocks are merged.'''
+        starts = iter(range(start, len(fixture), self.block_rounds))
+        pending = deque()
+
+        def submit():
+            for start in starts:
+                stop = min(start + self.block_rounds, len(fixture))
+                pending.append((start, executor.submit(play_block, start,
+                                                       stop)))
+                return
+
+        for _ in range(2 * self.workers):
+            submit()
+
+        while pending:
+            start, future = pending.popleft()
+
+            with self.phase('season'):
+                round_results, round_tallies = future.result()
+
+            submit()
+
+            # Record each round as it is yielded, so that the ladder always
+            # matches the rounds yielded so far.
+            for offset, (results, tallies) in enumerate(zip(round_results,
+                                                            round_tallies)):
+                with self.phase('season'):
+                    record_tallies(self.ladder, tallies, results)
+
+                yield start + offset + 1, results
@@ -7,9 +7,13 @@ WIN = 1
 LOSS = 2
 
 
-def basic_game(team1, team2, teams, settings):
+def basic_game(team1, team2, teams, settings, rng=random):
     # A template for all games. The game must take two team dictionaries.
 
+    # Any randomness must be drawn from rng, which has the interface of the
+    # random module. A seeded generator is passed for each match so that
+    # simulations can be reproduced.
+
     # If the game is won by a team, the result is set to the WIN constant.
     # If the game is drawn, the result is set to the DRAW constant.
     result = WIN
@@ -21,14 +25,15 @@ def basic_game(team1, team2, teams, settings):
     loser = team2
 
     # All extra game statistics are stored in the stats dictionary. The key for
-    # each entry is the name of the statistic.
+    # each entry is the name of the statistic, and each must be listed in the
+    # game's 'stats' entry in the games dictionary.
     stats = {}
 
     # The game must return this information in the following tuple format.
     return (result, winner, loser, stats)
 
 
-def cricket(team1, team2, teams, settings):
+def cricket(team1, team2, teams, settings, rng=random):
     '''Simulate a game of cricket.'''
 
     if teams[team1]['Strength'] == teams[team2]['Strength']:
@@ -47,16 +52,16 @@ def cricket(team1, team2, teams, settings):
             teams[team1]['Strength'] += 1
 
     # Generate winner statistics
-    winning_runs = random.randint(settings['min_runs'], settings['max_runs'])
-    winning_wickets = random.randint(5, 10)
+    winning_runs = rng.randint(settings['min_runs'], settings['max_runs'])
+    winning_wickets = rng.randint(5, 10)
     winning_score = str(winning_wickets) + '/' + str(winning_runs)
 
     if result == DRAW:
         losing_runs = winning_runs
     else:
-        losing_runs = random.randint(80, winning_runs)
+        losing_runs = rng.randint(80, winning_runs)
 
-    losing_wickets = random.randint(5, 10)
+    losing_wickets = rng.randint(5, 10)
     losing_score = str(losing_wickets) + '/' + str(losing_runs)
 
     stats = {'Winning Score': winning_score,
@@ -66,7 +71,7 @@ def cricket(team1, team2, teams, settings):
     return ((result, winner, loser, stats), teams)
 
 
-def football(team1, team2, teams, settings):
+def football(team1, team2, teams, settings, rng=random):
     '''Simulate a game of football (soccer).'''
 
     if teams[team1]['Strength'] == teams[team2]['Strength']:
@@ -83,24 +88,102 @@ def football(team1, team2, teams, settings):
             loser = team1
 
     # Generate winner statistics
-    winning_goals = random.randint(1, 3)
+    winning_goals = rng.randint(1, 3)
 
     if result == DRAW:
         losing_goals = winning_goals
     else:
-        losing_goals = random.randint(0, winning_goals - 1)
+        losing_goals = rng.randint(0, winning_goals - 1)
 
     stats = {'Winning Score': winning_goals,
              'Losing Score': losing_goals}
 
     return ((result, winner, loser, stats), teams)
 
+
+def football_probabilities(team1, team2, teams, settings):
+    '''Return the probabilities of team1 winning, a draw and team2 winning a
+    game of football (soccer).'''
+    if teams[team1]['Strength'] == teams[team2]['Strength']:
+        return (0.0, 1.0, 0.0)
+    elif teams[team1]['Strength'] > teams[team2]['Strength']:
+        return (1.0, 0.0, 0.0)
+    return (0.0, 0.0, 1.0)
+
+
+def cricket_batch(home, away, strength, settings, rng):
+    '''Simulate a batch of cricket games at once. Each team may appear in at
+    most one game of the batch, as in a single round.'''
+    import numpy as np
+
+    home_strength = strength[home]
+    away_strength = strength[away]
+
+    drawn = home_strength == away_strength
+    home_won = home_strength >= away_strength
+
+    results = np.where(drawn, DRAW, WIN)
+    winners = np.where(home_won, home, away)
+    losers = np.where(home_won, away, home)
+
+    strength[losers[~drawn]] += 1
+
+    # Generate winner statistics
+    size = len(home)
+    winning_runs = rng.integers(settings['min_runs'], settings['max_runs'],
+                                size=size, endpoint=True)
+    winning_wickets = rng.integers(5, 10, size=size, endpoint=True)
+
+    losing_runs = rng.integers(80, np.maximum(winning_runs, 80), endpoint=True)
+    losing_runs = np.where(drawn, winning_runs, losing_runs)
+    losing_wickets = rng.integers(5, 10, size=size, endpoint=True)
+
+    def score(wickets, runs):
+        return np.char.add(np.char.add(wickets.astype(str), '/'),
+                           runs.astype(str))
+
+    stats = {'Winning Score': score(winning_wickets, winning_runs),
+             'Losing Score': score(losing_wickets, losing_runs)}
+
+    return ((results, winners, losers, stats), strength)
+
+
+def football_batch(home, away, strength, settings, rng):
+    '''Simulate a batch of football (soccer) games at once.'''
+    import numpy as np
+
+    home_strength = strength[home]
+    away_strength = strength[away]
+
+    drawn = home_strength == away_strength
+    home_won = home_strength >= away_strength
+
+    results = np.where(drawn, DRAW, WIN)
+    winners = np.where(home_won, home, away)
+    losers = np.where(home_won, away, home)
+
+    # Generate winner statistics
+    winning_goals = rng.integers(1, 3, size=len(home), endpoint=True)
+    losing_goals = np.where(drawn, winning_goals,
+                            rng.integers(0, winning_goals))
+
+    stats = {'Winning Score': winning_goals,
+             'Losing Score': losing_goals}
+
+    return ((results, winners, losers, stats), strength)
+
 # Define default characteristics of each game.
 games = {'Cricket': {'parameters': ['Name', 'Strength'],
                      'function_name': cricket,
+                     'batch_function': cricket_batch,
+                     'stats': ['Winning Score', 'Losing Score'],
                      'settings': {'max_runs': '180',
                                   'min_runs': '120'}},
          'Football (soccer)': {'parameters': ['Name', 'Strength', 'Goals'],
                                'function_name': football,
+                               'batch_function': football_batch,
+                               'stateless': True,
+                               'probabilities': football_probabilities,
+                               'stats': ['Winning Score', 'Losing Score'],
                                'settings': {'max_goals': '3',
                                             'min_goals': '1'}}}
\ No newline at end of file
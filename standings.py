@@ -0,0 +1,75 @@
+from bisect import bisect_left, insort
+from itertools import islice
+
+
+class SortedStandings:
+    '''A sorted collection of ladder keys which stays in order as keys are
+    added and removed.
+
+    Keys are stored in a list of short sorted blocks, together with the
+    largest key of each block. Finding a key is a binary search over the
+    block maximums followed by one inside the block, so adding or removing a
+    key only shifts a single short block rather than the whole ladder, and
+    the first n keys can be read off without sorting.'''
+
+    block_size = 512
+
+    def __init__(self, keys=()):
+        keys = sorted(keys)
+        self.blocks = [keys[i:i + self.block_size]
+                       for i in range(0, len(keys), self.block_size)]
+        self.maxes = [block[-1] for block in self.blocks]
+        self.size = len(keys)
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for block in self.blocks:
+            yield from block
+
+    def add(self, key):
+        '''Insert key in its sorted position.'''
+        if not self.blocks:
+            self.blocks.append([key])
+            self.maxes.append(key)
+            self.size += 1
+            return
+
+        # Insert into the first block whose maximum is not less than key, or
+        # the last block if key is larger than everything stored.
+        index = min(bisect_left(self.maxes, key), len(self.blocks) - 1)
+        block = self.blocks[index]
+        insort(block, key)
+        self.maxes[index] = block[-1]
+        self.size += 1
+
+        # Split blocks which have grown too large to shift cheaply.
+        if len(block) > 2 * self.block_size:
+            self.blocks.insert(index + 1, block[self.block_size:])
+            del block[self.block_size:]
+            self.maxes.insert(index, block[-1])
+
+    def remove(self, key):
+        '''Remove key, raising a KeyError if it is not present.'''
+        index = bisect_left(self.maxes, key)
+        if index == len(self.blocks):
+            raise KeyError(key)
+
+        block = self.blocks[index]
+        position = bisect_left(block, key)
+        if block[position] != key:
+            raise KeyError(key)
+
+        del block[position]
+        self.size -= 1
+
+        if block:
+            self.maxes[index] = block[-1]
+        else:
+            del self.blocks[index]
+            del self.maxes[index]
+
+    def first(self, n):
+        '''Return the n smallest keys in order.'''
+        return list(islice(self, n))
@@ -0,0 +1,186 @@
+'''Checks that the faster ways of running a season give the same results as
+the straightforward ones. Run with python -m unittest.'''
+
+import contextlib
+import filecmp
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import ladder
+import sports
+from sharded import ShardedSimulation
+
+
+def make_teams(size, seed=0):
+    rng = random.Random(seed)
+    return {'Team {:02d}'.format(number): {'Strength': rng.randint(1, 10),
+                                           'Goals': rng.randint(1, 10)}
+            for number in range(size)}
+
+
+def listed_round_robin(teams, settings):
+    '''The round robin as it was generated before RoundRobinFixture, by
+    rotating a list of teams and building every round up front.'''
+    team_names = list(teams.keys())
+
+    if len(team_names) % 2 != 0:
+        team_names.append(ladder.BYE)
+
+    rounds = []
+    for _ in range(settings['revolutions']):
+        for _ in range(len(team_names) - 1):
+            rounds.append(ladder.loop_matches(team_names))
+            team_names = ladder.rotate_except_first(team_names)
+
+    return rounds
+
+
+class EquivalenceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.structure = {'function_name': ladder.round_robin,
+                          'settings': {'revolutions': '2',
+                                       'tie_breakers': ''}}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def run_simulation(self, simulation_class, game, output, stop_after=None,
+                       **kwargs):
+        '''Run a season and finals, returning the ladder and finals report.
+        If stop_after is given, the run is abandoned without being closed
+        once that many rounds have been played, as if it had crashed.'''
+        simulation = simulation_class(make_teams(13), game, self.structure,
+                                      seed=5, output=self.path(output),
+                                      verbose=False, **kwargs)
+
+        for status in simulation.simulate_season():
+            if stop_after is not None and status == stop_after - 1:
+                return None
+            season_ladder = status
+
+        return season_ladder.matrix(), simulation.simulate_finals()
+
+    def unbuffered(self):
+        '''Write every result as it is stored, so that an abandoned run
+        leaves rows after its last checkpoint.'''
+        patches = [mock.patch.object(ladder.ResultWriter, 'buffer_size', 1)]
+
+        if ladder.batch_available:
+            import columnar
+            patches.append(mock.patch.object(columnar.BinaryResultWriter,
+                                             'buffer_size', 1))
+
+        stack = contextlib.ExitStack()
+        for patch in patches:
+            stack.enter_context(patch)
+        return stack
+
+    def assertSameFiles(self, first, second):
+        self.assertTrue(filecmp.cmp(self.path(first), self.path(second),
+                                    shallow=False))
+
+    def test_lazy_round_robin(self):
+        for size in (0, 1, 2, 7, 8):
+            for revolutions in (0, 1, 3):
+                teams = make_teams(size)
+                settings = {'revolutions': revolutions}
+
+                fixture = ladder.round_robin(teams, settings)
+                expected = listed_round_robin(teams, settings)
+
+                self.assertEqual(len(fixture), len(expected))
+                self.assertEqual(list(fixture), expected)
+                self.assertEqual([fixture[index] for index
+                                  in range(len(fixture))], expected)
+
+    def test_sharded(self):
+        # Cricket changes its teams and is played round by round; football
+        # is stateless and is played in blocks of rounds.
+        for game_name in ('Cricket', 'Football (soccer)'):
+            with self.subTest(game=game_name):
+                game = sports.games[game_name]
+
+                serial = self.run_simulation(ladder.Simulation, game,
+                                             'serial.csv')
+                sharded = self.run_simulation(ShardedSimulation, game,
+                                              'sharded.csv', workers=2,
+                                              block_rounds=5)
+
+                self.assertEqual(serial, sharded)
+                self.assertSameFiles('serial.csv', 'sharded.csv')
+
+    @unittest.skipUnless(ladder.batch_available, 'NumPy is not installed')
+    def test_columnar_ladder(self):
+        import columnar
+
+        game = sports.games['Cricket']
+
+        plain = self.run_simulation(ladder.Simulation, game, 'plain.csv')
+        columns = self.run_simulation(ladder.Simulation, game, 'columns.csv',
+                                      ladder_class=columnar.ColumnarLadder)
+
+        self.assertEqual(plain, columns)
+        self.assertSameFiles('plain.csv', 'columns.csv')
+
+    def test_parallel_knockout(self):
+        # Instrumented games must be unwrapped before they are sent to
+        # the workers.
+        game = sports.games['Cricket']
+        reports = []
+
+        for workers in ('1', '2', '4'):
+            finals = {'function_name': ladder.knockout,
+                      'settings': {'top_teams': '0', 'workers': workers}}
+            simulation = ladder.Simulation(
+                make_teams(13), game, self.structure, finals, seed=5,
+                output=self.path('knockout-' + workers + '.csv'),
+                instrument=True, verbose=False)
+
+            for status in simulation.simulate_season():
+                pass
+            reports.append(simulation.simulate_finals())
+
+        self.assertEqual(reports[0], reports[1])
+        self.assertEqual(reports[0], reports[2])
+        self.assertSameFiles('knockout-1.csv', 'knockout-2.csv')
+        self.assertSameFiles('knockout-1.csv', 'knockout-4.csv')
+
+    def test_resume(self):
+        game = sports.games['Cricket']
+
+        outputs = ['out.csv']
+        if ladder.batch_available:
+            outputs.append('out' + ladder.binary_extension)
+
+        for output in outputs:
+            with self.subTest(output=output), self.unbuffered():
+                checkpoint = self.path(output + '.checkpoint')
+                uninterrupted = self.run_simulation(ladder.Simulation, game,
+                                                    'whole-' + output)
+
+                # Stop two rounds after a checkpoint, so that the rows written
+                # since it must be discarded.
+                self.run_simulation(ladder.Simulation, game, output,
+                                    stop_after=8, checkpoint=checkpoint,
+                                    checkpoint_rounds=6)
+                resumed = self.run_simulation(ladder.Simulation, game, output,
+                                              checkpoint=checkpoint,
+                                              checkpoint_rounds=6,
+                                              resume=True)
+
+                self.assertEqual(uninterrupted, resumed)
+                self.assertSameFiles('whole-' + output, output)
+                self.assertFalse(os.path.exists(checkpoint))
+
+
+if __name__ == '__main__':
+    unittest.main()
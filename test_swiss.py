@@ -0,0 +1,84 @@
+'''Checks of the rounds paired by ladder.SwissFixture. Run with python -m
+unittest.'''
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import ladder
+import sports
+from test_equivalence import make_teams
+
+
+class SwissFixtureTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def paired_rounds(self, teams, game, seed):
+        '''Play a Swiss season of the default length, returning the matches
+        of each round as they were paired.'''
+        fixture = ladder.swiss(teams, {'rounds': 0})
+        rounds = []
+        pair_round = fixture.pair_round
+
+        def recorded_round():
+            rounds.append(pair_round())
+            return rounds[-1]
+
+        fixture.pair_round = recorded_round
+
+        structure = {'function_name': lambda teams, settings: fixture,
+                     'settings': {'tie_breakers': ''}}
+        simulation = ladder.Simulation(
+            teams, game, structure, seed=seed, verbose=False,
+            output=os.path.join(self.directory, 'out.csv'))
+
+        for status in simulation.simulate_season():
+            pass
+        simulation.close()
+
+        return rounds
+
+    def test_pairing(self):
+        # Rematches are most likely in the last score group, so check a
+        # range of sizes with both sports.
+        for game_name in ('Cricket', 'Football (soccer)'):
+            for size in range(2, 40):
+                with self.subTest(game=game_name, size=size):
+                    teams = make_teams(size, seed=size)
+                    rounds = self.paired_rounds(teams, sports.games[game_name],
+                                                seed=size)
+                    self.assertEqual(len(rounds), (size - 1).bit_length())
+
+                    played = set()
+                    for matches in rounds:
+                        names = [team for match in matches for team in match
+                                 if team != ladder.BYE]
+                        self.assertEqual(sorted(names), sorted(teams))
+
+                        for match in matches:
+                            if ladder.BYE not in match:
+                                self.assertNotIn(frozenset(match), played)
+                                played.add(frozenset(match))
+
+    def test_bye_is_a_win(self):
+        teams = make_teams(5)
+        fixture = ladder.swiss(teams, {'rounds': 0})
+        season_ladder = ladder.Ladder(len(fixture), teams)
+        fixture.attach(season_ladder)
+
+        matches = fixture.pair_round()
+        bye = next(team for team, opponent in matches if opponent == ladder.BYE)
+
+        entries = {entry['Name']: entry for entry in season_ladder.ordered()}
+        self.assertEqual(entries[bye]['Win'], 1)
+        self.assertEqual(sum(entry['Win'] for entry in entries.values()), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
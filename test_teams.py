@@ -0,0 +1,71 @@
+'''Checks of reading team files with ladder.read_teams. Run with python -m
+unittest.'''
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import ladder
+
+parameters = ['Name', 'Strength']
+
+
+class ReadTeamsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, text):
+        filename = os.path.join(self.directory, 'teams.csv')
+        with open(filename, 'w', newline='') as f:
+            f.write(text)
+        return filename
+
+    def assertError(self, text, message, chunk_size=2):
+        with self.assertRaises(ValueError) as caught:
+            ladder.read_teams(self.write(text), parameters, chunk_size)
+        self.assertEqual(str(caught.exception), message)
+
+    def test_teams(self):
+        filename = self.write('Name,Strength,City\nA,3,X\nB,5,Y\nC,7,Z\n')
+        self.assertEqual(ladder.read_teams(filename, parameters, 2),
+                         {'A': {'Strength': 3, 'City': 'X'},
+                          'B': {'Strength': 5, 'City': 'Y'},
+                          'C': {'Strength': 7, 'City': 'Z'}})
+
+    def test_blank_lines(self):
+        # The blank lines fill a whole chunk after the teams, then part of
+        # one between them.
+        for text in ('Name,Strength\nA,3\nB,5\n\n\n',
+                     'Name,Strength\n\n\n\nA,3\n\nB,5\n',
+                     'Name,Strength\n\n\n'):
+            with self.subTest(text=text):
+                teams = ladder.read_teams(self.write(text), parameters, 2)
+                self.assertEqual(sorted(teams), sorted(
+                    line.split(',')[0] for line in text.split('\n')[1:]
+                    if line))
+
+    def test_repeated_name(self):
+        self.assertError('Name,Strength\nA,3\nB,5\nC,1\nA,4\n',
+                         'Line 5: team A is listed more than once!')
+
+    def test_not_an_integer(self):
+        self.assertError('Name,Strength\nA,3\nB,5\nC,strong\n',
+                         "Line 4: Strength value 'strong' is not an "
+                         'integer!')
+
+    def test_missing_column(self):
+        self.assertError('Name,Goals\nA,3\n', 'Line 1: missing column '
+                                              'Strength!')
+
+    def test_wrong_length(self):
+        self.assertError('Name,Strength\nA,3\nB,5,6\n',
+                         'Line 3: expected 2 values but found 3!')
+
+
+if __name__ == '__main__':
+    unittest.main()